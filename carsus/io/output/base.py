@@ -1,21 +1,48 @@
+import functools
+import hashlib
 import logging
+import pathlib
+import platform
+import uuid
+from datetime import datetime, timezone
 
 import numpy as np
 import pandas as pd
 
+try:
+    import importlib.metadata as importlib_metadata
+except ImportError:  # Python < 3.8
+    importlib_metadata = None
+
+from carsus import FORMAT_VERSION
+
 from carsus.io.output.collisions import ChiantiCollisionsPreparer, CollisionsPreparer
 from carsus.io.output.ionization_energies import IonizationEnergiesPreparer
 from carsus.io.output.levels_lines import LevelsLinesPreparer
 from carsus.io.output.macro_atom import MacroAtomPreparer
 from carsus.io.output.photo_ionization import PhotoIonizationPreparer
 
-from carsus.util import (
-    hash_pandas_object,
-    serialize_pandas_object,
-)
+from carsus.util import update_hash_pandas_object
 
 logger = logging.getLogger(__name__)
 
+# Columns kept in double precision by `to_hdf(..., downcast=True)`
+FLOAT64_COLUMNS = ["mass", "energy", "ionization_energy", "wavelength", "nu", "delta_e"]
+
+# Integer columns and index levels narrowed by `to_hdf(..., downcast=True)`,
+# ids and counts are kept as int64
+DOWNCAST_INT_DTYPES = {
+    "atomic_number": np.uint8,
+    "ion_number": np.uint8,
+    "ion_charge": np.uint8,
+    "level_number": np.uint16,
+    "level_number_lower": np.uint16,
+    "level_number_upper": np.uint16,
+    "source_level_number": np.uint16,
+    "destination_level_number": np.uint16,
+    "g": np.uint16,
+}
+
 
 class TARDISAtomData:
     """
@@ -23,6 +50,7 @@ class TARDISAtomData:
     ----------
 
     levels : pandas.DataFrame
+    levels_by_id : pandas.DataFrame
     lines : pandas.DataFrame
     collisions : pandas.DataFrame
     macro_atom : pandas.DataFrame
@@ -65,16 +93,6 @@ class TARDISAtomData:
 
         self.ionization_energies_preparer = IonizationEnergiesPreparer(self.cmfgen_reader, ionization_energies)
 
-        self.levels_lines_preparer = LevelsLinesPreparer(self.ionization_energies, self.gfall_reader, self.chianti_reader, self.cmfgen_reader)
-        self.levels_all = self.levels_lines_preparer.all_levels_data
-        self.lines_all = self.levels_lines_preparer.all_lines_data
-        self.levels_lines_preparer.create_levels_lines(**self.levels_lines_param)
-        self.levels, self.lines = self.levels_lines_preparer.levels, self.levels_lines_preparer.lines
-
-        self.macro_atom_preparer = MacroAtomPreparer(self.levels, self.lines)
-        self.macro_atom_preparer.create_macro_atom()
-        self.macro_atom_preparer.create_macro_atom_references()
-            
         if ((cmfgen_reader is not None) and hasattr(cmfgen_reader, "collisions")) and (
             (chianti_reader is not None) and hasattr(chianti_reader, "collisions")
         ):
@@ -83,22 +101,70 @@ class TARDISAtomData:
                 "Please set collisions=True in one or the other but not both."
             )
 
-        if cmfgen_reader is not None and hasattr(cmfgen_reader, "collisions"):
-            self.collisions_preparer = CollisionsPreparer(self.cmfgen_reader)
-        elif hasattr(chianti_reader, "collisions"):
-            self.collisions_preparer = ChiantiCollisionsPreparer(self.chianti_reader, self.levels, self.levels_all, self.lines_all, self.levels_lines_preparer.chianti_ions, self.collisions_param)
+    # The preparers are created on first access, so only the data that is
+    # actually requested gets processed.
+
+    # replace with functools.cached_property with Python > 3.8
+    @property
+    @functools.lru_cache()
+    def levels_lines_preparer(self):
+        levels_lines_preparer = LevelsLinesPreparer(self.ionization_energies, self.gfall_reader, self.chianti_reader, self.cmfgen_reader)
+        levels_lines_preparer.create_levels_lines(**self.levels_lines_param)
+        return levels_lines_preparer
+
+    # replace with functools.cached_property with Python > 3.8
+    @property
+    @functools.lru_cache()
+    def macro_atom_preparer(self):
+        macro_atom_preparer = MacroAtomPreparer(self.levels, self.lines)
+        macro_atom_preparer.create_macro_atom()
+        macro_atom_preparer.create_macro_atom_references()
+        return macro_atom_preparer
+
+    # replace with functools.cached_property with Python > 3.8
+    @property
+    @functools.lru_cache()
+    def collisions_preparer(self):
+        if self.cmfgen_reader is not None and hasattr(self.cmfgen_reader, "collisions"):
+            collisions_preparer = CollisionsPreparer(self.cmfgen_reader)
+        elif hasattr(self.chianti_reader, "collisions"):
+            collisions_preparer = ChiantiCollisionsPreparer(self.chianti_reader, self.levels_by_id, self.levels_all, self.lines_all, self.levels_lines_preparer.chianti_ions, self.collisions_param)
         else:
             logger.warning("No source of collisions was selected.")
-            self.collisions_preparer = None
+            return None
+
+        collisions_preparer.prepare_collisions()
+        return collisions_preparer
 
-        if (cmfgen_reader is not None) and hasattr(cmfgen_reader, "cross_sections"):
-            self.cross_sections_preparer = PhotoIonizationPreparer(self.levels, self.levels_all, self.lines_all, self.cmfgen_reader,  self.levels_lines_preparer.cmfgen_ions)
+    # replace with functools.cached_property with Python > 3.8
+    @property
+    @functools.lru_cache()
+    def cross_sections_preparer(self):
+        if (self.cmfgen_reader is not None) and hasattr(self.cmfgen_reader, "cross_sections"):
+            return PhotoIonizationPreparer(self.levels_by_id, self.levels_all, self.lines_all, self.cmfgen_reader,  self.levels_lines_preparer.cmfgen_ions)
         else:
-            self.cross_sections_preparer = None
-            
+            return None
+
+    @property
+    def levels_all(self):
+        return self.levels_lines_preparer.all_levels_data
+
+    @property
+    def lines_all(self):
+        return self.levels_lines_preparer.all_lines_data
+
+    @property
+    def levels(self):
+        return self.levels_lines_preparer.levels
+
+    @property
+    def lines(self):
+        return self.levels_lines_preparer.lines
+
+    @property
+    def levels_by_id(self):
+        return self.levels_lines_preparer.levels_by_id
 
-        logger.info("Finished.")
-    
     @property
     def ionization_energies(self):
         return self.ionization_energies_preparer.ionization_energies
@@ -148,7 +214,6 @@ class TARDISAtomData:
     @property
     def collisions_prepared(self):
         if self.collisions_preparer is not None:
-            self.collisions_preparer.prepare_collisions()
             return self.collisions_preparer.collisions_prepared
         else:
             return None
@@ -160,7 +225,58 @@ class TARDISAtomData:
         else:
             return None
 
-    def to_hdf(self, fname):
+    def _get_outputs(self):
+        """
+        Ordered `(hdf_path, data)` pairs of the tables to be written. The
+        required tables are always prepared, so errors raised while
+        preparing them propagate. Optional tables are skipped when their
+        source is missing or `None`.
+
+        Returns
+        -------
+        list of (str, pandas.DataFrame or pandas.Series)
+
+        """
+        outputs = [
+            ("/atom_data", self.atomic_weights.base),
+            ("/ionization_data", self.ionization_energies_prepared),
+            ("/zeta_data", self.zeta_data.base),
+            ("/levels_data", self.levels_prepared),
+            ("/lines_data", self.lines_prepared),
+            ("/macro_atom_data", self.macro_atom_prepared),
+            ("/macro_atom_references", self.macro_atom_references_prepared),
+        ]
+
+        optional_outputs = [
+            ("/nuclear_decay_rad", self.nndc_reader, "decay_data"),
+            ("/linelist_atoms", self.vald_reader, "linelist_atoms"),
+            ("/linelist_molecules", self.vald_reader, "linelist_molecules"),
+            ("/molecules/equilibrium_constants", self.barklem_2016_data, "equilibrium_constants"),
+            ("/molecules/ionization_energies", self.barklem_2016_data, "ionization_energies"),
+            ("/molecules/dissociation_energies", self.barklem_2016_data, "dissociation_energies"),
+            ("/molecules/partition_functions", self.barklem_2016_data, "partition_functions"),
+        ]
+
+        for hdf_path, reader, attr in optional_outputs:
+            data = getattr(reader, attr, None)
+            if data is not None:
+                outputs.append((hdf_path, data))
+
+        # The preparers are lazy, read their properties directly so errors
+        # are not mistaken for a missing source (they return `None` then)
+        prepared_outputs = [
+            ("/collisions_data", self.collisions_prepared),
+            ("/collisions_metadata", self.collisions_metadata),
+            ("/photoionization_data", self.cross_sections_prepared),
+        ]
+
+        for hdf_path, data in prepared_outputs:
+            if data is not None:
+                outputs.append((hdf_path, data))
+
+        return outputs
+
+    def to_hdf(self, fname, complib="blosc:lz4", complevel=1, downcast=False):
         """
         Dump `prepared` attributes into an HDF5 file.
 
@@ -168,99 +284,58 @@ class TARDISAtomData:
         ----------
         fname : path
            Path to the HDF5 output file.
+        complib : str, optional
+           Compression library passed to `pandas.HDFStore`, by default
+           "blosc:lz4". Readers need PyTables with Blosc support.
+        complevel : int, optional
+           Compression level, 0 disables compression, by default 1.
+        downcast : bool, optional
+           Store float columns as float32 (except `FLOAT64_COLUMNS`) and
+           the integer columns and index levels in `DOWNCAST_INT_DTYPES`
+           (atomic and ion numbers, level numbers, `g`) as unsigned
+           integers, by default False. Ids and counts stay int64. Readers
+           must upcast before any arithmetic that could overflow or wrap
+           around the narrow types.
 
         """
-        import hashlib
-        import platform
-        import uuid
-        from datetime import datetime
-
-        import pytz
-
-        from carsus import FORMAT_VERSION
-
-        required_outputs = {
-            "/atom_data": self.atomic_weights.base, 
-            "/ionization_data": self.ionization_energies_prepared,
-            "/zeta_data": self.zeta_data.base,
-            "/levels_data": self.levels_prepared,
-            "/lines_data": self.lines_prepared,
-            "/macro_atom_data": self.macro_atom_prepared,
-            "/macro_atom_references": self.macro_atom_references_prepared}
-        
-        optional_outputs = {
-            "/nuclear_decay_rad": (self.nndc_reader, "decay_data"),
-            "/linelist_atoms": (self.vald_reader, "linelist_atoms"),
-            "/linelist_molecules": (self.vald_reader, "linelist_molecules"),
-            "/molecules/equilibrium_constants": (self.barklem_2016_data, "equilibrium_constants"),
-            "/molecules/ionization_energies": (self.barklem_2016_data, "ionization_energies"),
-            "/molecules/dissociation_energies": (self.barklem_2016_data, "dissociation_energies"),
-            "/molecules/partition_functions": (self.barklem_2016_data, "partition_functions"),
-            "/collisions_data": (self, "collisions_prepared"),
-            "/collisions_metadata": (self, "collisions_metadata"),
-            "/photoionization_data": (self.cross_sections_preparer, "cross_sections_prepared"),
-        }
-
-        with pd.HDFStore(fname, "w") as f:
-            for hdf_path, data in required_outputs.items():
-                f.put(hdf_path, data)
+        total_checksum = hashlib.md5()
+
+        # Prepare every table before the file is opened, so a failure does
+        # not leave a truncated file behind
+        outputs = self._get_outputs()
+
+        # PyTables system attributes (CLASS, VERSION, TITLE) are not needed
+        # to read the file back with pandas, skip writing them on every node
+        with pd.HDFStore(
+            fname,
+            "w",
+            complib=complib,
+            complevel=complevel,
+            pytables_sys_attrs=False,
+        ) as f:
+
+            for hdf_path, data in outputs:
+                if downcast:
+                    data = _downcast_dtypes(data)
 
-            for hdf_path, (reader, data) in optional_outputs.items():
-                if hasattr(reader, data):
-                    f.put(hdf_path, getattr(reader, data))
-
-            lines_metadata = pd.DataFrame(
-                data=[["format", "version", "1.0"]], columns=["field", "key", "value"]
-            ).set_index(["field", "key"])
-            f.put("/lines_metadata", lines_metadata)
+                f.put(hdf_path, data)
 
-            meta = []
-            meta.append(("format", "version", FORMAT_VERSION))
+            f.put("/lines_metadata", _get_lines_metadata())
 
-            total_checksum = hashlib.md5()
+            # Hash the tables as they are read back from the file, so the
+            # checksums do not depend on the in-memory layout (blocks, index
+            # type) and can be recomputed from the file
+            checksums = []
             for key in f.keys():
+                checksum = hashlib.md5()
+
                 # update the total checksum to sign the file
-                total_checksum.update(serialize_pandas_object(f[key]))
+                update_hash_pandas_object(f[key], checksum, total_checksum)
 
                 # save individual DataFrame/Series checksum
-                checksum = hash_pandas_object(f[key])
-                meta.append(("md5sum", key.lstrip("/"), checksum))
-
-            # data sources versions
-            meta.append(("datasets", "nist_weights", self.atomic_weights.version))
-
-            meta.append(("datasets", "nist_spectra", self.ionization_energies.version))
-
-            meta.append(("datasets", "gfall", self.gfall_reader.version))
+                checksums.append((key.lstrip("/"), checksum.hexdigest()))
 
-            meta.append(("datasets", "zeta", self.zeta_data.version))
-
-            if self.chianti_reader is not None:
-                meta.append(("datasets", "chianti", self.chianti_reader.version))
-
-            if self.cmfgen_reader is not None:
-                meta.append(("datasets", "cmfgen", self.cmfgen_reader.version))
-
-            if self.vald_reader is not None:
-                meta.append(("datasets", "vald", self.vald_reader.version))
-
-            # relevant package versions
-            meta.append(("software", "python", platform.python_version()))
-            imports = [
-                "carsus",
-                "astropy",
-                "numpy",
-                "pandas",
-                "tables",
-                "ChiantiPy",
-            ]
-
-            for package in imports:
-                meta.append(("software", package, __import__(package).__version__))
-
-            meta_df = pd.DataFrame.from_records(
-                meta, columns=["field", "key", "value"], index=["field", "key"]
-            )
+            meta_df = self._get_metadata(checksums)
 
             uuid1 = uuid.uuid1().hex
 
@@ -273,9 +348,293 @@ class TARDISAtomData:
             f.root._v_attrs["UUID1"] = uuid1
             f.root._v_attrs["FORMAT_VERSION"] = FORMAT_VERSION
 
-            tz = pytz.timezone("UTC")
-            date = datetime.now(tz).isoformat()
+            date = datetime.now(timezone.utc).isoformat()
             f.root._v_attrs["DATE"] = date
 
             self.meta = meta_df
             f.put("/metadata", meta_df)
+
+        logger.info("Finished.")
+
+    def _get_metadata(self, checksums):
+        """
+        Returns the `metadata` table: format version, table checksums,
+        versions of the data sources and of the relevant packages.
+
+        Parameters
+        ----------
+        checksums : list of tuple
+           (key, md5sum) pairs, one per table.
+
+        Returns
+        -------
+        pandas.DataFrame
+
+        """
+        meta = []
+        meta.append(("format", "version", FORMAT_VERSION))
+        meta.extend(("md5sum", key, checksum) for key, checksum in checksums)
+
+        # data sources versions
+        datasets = [
+            ("nist_weights", self.atomic_weights),
+            ("nist_spectra", self.ionization_energies),
+            ("gfall", self.gfall_reader),
+            ("zeta", self.zeta_data),
+            ("chianti", self.chianti_reader),
+            ("cmfgen", self.cmfgen_reader),
+            ("vald", self.vald_reader),
+        ]
+        meta.extend(
+            ("datasets", name, source.version)
+            for name, source in datasets
+            if source is not None
+        )
+
+        # relevant package versions
+        meta.append(("software", "python", platform.python_version()))
+        for package, version in _get_package_versions().items():
+            meta.append(("software", package, version))
+
+        return pd.DataFrame.from_records(
+            meta, columns=["field", "key", "value"], index=["field", "key"]
+        )
+
+    def _to_columnar(self, dirpath, extension, write, read, reset_index=False):
+        dirpath = pathlib.Path(dirpath)
+
+        outputs = self._get_outputs()
+        outputs.append(("/lines_metadata", _get_lines_metadata()))
+
+        checksums = []
+
+        for hdf_path, data in outputs:
+            key = hdf_path.lstrip("/")
+            fname = dirpath / f"{key}.{extension}"
+            fname.parent.mkdir(parents=True, exist_ok=True)
+            write(_to_columnar_frame(data, reset_index=reset_index), fname)
+
+            # As in `to_hdf`, hash the table as read back from the file
+            checksum = hashlib.md5()
+            update_hash_pandas_object(read(fname), checksum)
+            checksums.append((key, checksum.hexdigest()))
+
+        meta_df = self._get_metadata(checksums)
+
+        self.meta = meta_df
+        write(
+            _to_columnar_frame(meta_df, reset_index=reset_index),
+            dirpath / f"metadata.{extension}",
+        )
+
+    def to_parquet(self, dirpath):
+        """
+        Dump `prepared` attributes into a directory of Parquet files, one
+        file per table (same layout as the HDF5 keys, including `metadata`
+        and `lines_metadata`). The `md5sum` entries of `metadata` hash the
+        tables as read back with `pandas.read_parquet`. Requires `pyarrow`.
+
+        Parameters
+        ----------
+        dirpath : path
+           Path to the output directory.
+
+        """
+        self._to_columnar(
+            dirpath,
+            "parquet",
+            lambda df, fname: df.to_parquet(
+                fname, engine="pyarrow", compression="zstd"
+            ),
+            lambda fname: pd.read_parquet(fname, engine="pyarrow"),
+        )
+
+    def to_feather(self, dirpath):
+        """
+        Dump `prepared` attributes into a directory of Feather files, one
+        file per table (same layout as the HDF5 keys, including `metadata`
+        and `lines_metadata`). Feather does not store indexes, so they are
+        written as regular columns. The `md5sum` entries of `metadata` hash
+        the tables as read back with `pandas.read_feather`. Requires
+        `pyarrow`.
+
+        Parameters
+        ----------
+        dirpath : path
+           Path to the output directory.
+
+        """
+        self._to_columnar(
+            dirpath,
+            "feather",
+            lambda df, fname: df.to_feather(fname, compression="zstd"),
+            pd.read_feather,
+            reset_index=True,
+        )
+
+
+def _get_lines_metadata():
+    """
+    Returns the `lines_metadata` table.
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    """
+    return pd.DataFrame(
+        data=[["format", "version", "1.0"]], columns=["field", "key", "value"]
+    ).set_index(["field", "key"])
+
+
+@functools.lru_cache()
+def _get_package_versions():
+    """
+    Returns the versions of the relevant packages, computed once.
+
+    Versions are read from the installed package metadata, so the packages
+    are not imported (ChiantiPy is slow to import). Packages without
+    metadata (e.g. a source checkout of carsus), and every package on
+    Python < 3.8 where `importlib.metadata` is missing, fall back to their
+    `__version__` attribute.
+
+    Returns
+    -------
+    dict
+
+    """
+    imports = [
+        "carsus",
+        "astropy",
+        "numpy",
+        "pandas",
+        "tables",
+        "ChiantiPy",
+    ]
+
+    versions = {}
+    for package in imports:
+        if importlib_metadata is not None:
+            try:
+                versions[package] = importlib_metadata.version(package)
+                continue
+            except importlib_metadata.PackageNotFoundError:
+                pass
+
+        versions[package] = __import__(package).__version__
+
+    return versions
+
+
+def _downcast_dtypes(data):
+    """
+    Narrow the numeric data of a DataFrame: float64 columns to float32
+    except for `FLOAT64_COLUMNS`, and the integer columns and index levels
+    named in `DOWNCAST_INT_DTYPES` to their fixed types. Other pandas
+    objects are returned unchanged.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame or pandas.Series
+
+    Returns
+    -------
+    pandas.DataFrame or pandas.Series
+
+    Raises
+    ------
+    ValueError
+        If the values of a column or index level do not fit in its type.
+
+    """
+    if not isinstance(data, pd.DataFrame):
+        return data
+
+    dtypes = {}
+
+    for col in data.select_dtypes("float64").columns:
+        if col not in FLOAT64_COLUMNS:
+            dtypes[col] = np.float32
+
+    for col in data.select_dtypes("int64").columns:
+        if col in DOWNCAST_INT_DTYPES:
+            dtypes[col] = _check_int_dtype(data[col], DOWNCAST_INT_DTYPES[col])
+
+    if dtypes:
+        data = data.astype(dtypes)
+
+    if isinstance(data.index, pd.MultiIndex):
+        levels = [
+            level.astype(_check_int_dtype(level, DOWNCAST_INT_DTYPES[name]))
+            if level.dtype == np.int64 and name in DOWNCAST_INT_DTYPES
+            else level
+            for level, name in zip(data.index.levels, data.index.names)
+        ]
+        data = data.set_axis(data.index.set_levels(levels))
+
+    elif data.index.dtype == np.int64 and data.index.name in DOWNCAST_INT_DTYPES:
+        dtype = _check_int_dtype(data.index, DOWNCAST_INT_DTYPES[data.index.name])
+        data = data.set_axis(data.index.astype(dtype))
+
+    return data
+
+
+def _check_int_dtype(values, dtype):
+    """
+    Returns `dtype` if it holds all `values`.
+
+    Parameters
+    ----------
+    values : pandas.Series or pandas.Index
+    dtype : type
+
+    Returns
+    -------
+    type
+
+    Raises
+    ------
+    ValueError
+        If `values` are out of the range of `dtype`.
+
+    """
+    info = np.iinfo(dtype)
+
+    if len(values) > 0 and (values.min() < info.min or values.max() > info.max):
+        raise ValueError(
+            f"Values of `{values.name}` do not fit in {np.dtype(dtype).name}."
+        )
+
+    return dtype
+
+
+def _to_columnar_frame(data, reset_index=False):
+    """
+    Convert a pandas object into a DataFrame that Arrow-based writers
+    accept.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame or pandas.Series
+    reset_index : bool, optional
+        Move the index into regular columns, by default False.
+
+    Returns
+    -------
+    pandas.DataFrame
+
+    """
+    if isinstance(data, pd.Series):
+        # Heterogeneous metadata series are stored as a single row
+        if data.dtype == object:
+            data = data.to_frame().T.reset_index(drop=True)
+        else:
+            data = data.to_frame()
+
+    if reset_index:
+        data = data.reset_index(drop=isinstance(data.index, pd.RangeIndex))
+
+    data = data.copy(deep=False)
+    data.columns = data.columns.astype(str)
+
+    return data
@@ -1,4 +1,5 @@
 import logging
+import math
 import re
 
 import astropy.constants as const
@@ -6,10 +7,13 @@ import numpy as np
 import pandas as pd
 from scipy import interpolate
 
-from carsus.io.util import get_lvl_index2id, exclude_artificial_levels
+from carsus.io.util import get_lvl_index2id
 
 logger = logging.getLogger(__name__)
 
+# Columns holding the collisional strengths, one per temperature
+C_UL_TEMPERATURE_COLUMN = re.compile(r"^t\d+$")
+
 class CollisionsPreparer:
     def __init__(self, reader):
         collisions = reader.collisions.copy()
@@ -24,6 +28,7 @@ class CollisionsPreparer:
 
         self.collisions = collisions
         self.collisions_metadata = reader.collisional_metadata
+        self.c_ul_temperature_cols = get_c_ul_temperature_cols(collisions)
     
     def prepare_collisions(self):
         """
@@ -43,43 +48,41 @@ class CollisionsPreparer:
         ]
 
         if "chianti" in self.collisions_metadata.dataset:
-            collisions_columns = (
-                collisions_index
-                + ["g_ratio", "delta_e"]
-                + sorted(
-                    [col for col in self.collisions.columns if re.match(r"^t\d+$", col)]
-                )
-            )
+            collisions_columns = ["g_ratio", "delta_e"] + self.c_ul_temperature_cols
 
         elif "cmfgen" in self.collisions_metadata.dataset:
-            collisions_columns = collisions_index + list(self.collisions.columns)
+            collisions_columns = list(self.collisions.columns)
 
         else:
             raise ValueError("Unknown source of collisional data")
 
-        collisions_prepared = (
-            self.collisions.reset_index().loc[:, collisions_columns].copy()
+        # Dropping the index columns would split the C_ul temperature columns
+        # into one block per column, the column selection leaves them out and
+        # keeps a single 2-D block instead
+        collisions_prepared = self.collisions.reset_index().set_index(
+            collisions_index, drop=False
         )
-        self.collisions_prepared = collisions_prepared.set_index(collisions_index)
+        self.collisions_prepared = collisions_prepared.loc[:, collisions_columns]
     
 
 class ChiantiCollisionsPreparer(CollisionsPreparer):
     def __init__(
             self, 
             chianti_reader, 
-            levels, 
+            levels_by_id, 
             levels_all, 
             lines_all, 
             chianti_ions, 
             collisions_param = {"temperatures": np.arange(2000, 50000, 2000)}
             ):
         self.chianti_reader = chianti_reader
-        self.levels = levels
+        self.levels_by_id = levels_by_id
         self.levels_all = levels_all
         self.lines_all = lines_all
         self.chianti_ions = chianti_ions
 
         self.collisions = self.create_chianti_collisions(**collisions_param)
+        self.c_ul_temperature_cols = get_c_ul_temperature_cols(self.collisions)
         self.collisions_metadata = pd.Series(
             {
                 "temperatures": collisions_param["temperatures"],
@@ -104,70 +107,50 @@ class ChiantiCollisionsPreparer(CollisionsPreparer):
         """
 
         logger.info("Ingesting collisional strengths.")
-        ch_collisions = self.chianti_reader.collisions
-        ch_collisions["ds_id"] = 4
-
-        # Not really needed because we have only one source of collisions
-        collisions = pd.concat([ch_collisions], sort=True)
+        collisions = self.chianti_reader.collisions
+        collisions["ds_id"] = 4
         ions = self.chianti_ions
 
+        # Keep the working frame flat, it is only indexed at the end
         collisions = collisions.reset_index()
         collisions = collisions.rename(columns={"ion_charge": "ion_number"})
-        collisions = collisions.set_index(["atomic_number", "ion_number"])
 
         logger.info("Matching collisions and levels.")
-        col_list = [
-            get_lvl_index2id(collisions.loc[ion], self.levels_all) for ion in ions
-        ]
-        collisions = pd.concat(col_list, sort=True)
+        ion_keys = pd.MultiIndex.from_arrays(
+            [collisions["atomic_number"], collisions["ion_number"]]
+        )
+        collisions = get_lvl_index2id(collisions[ion_keys.isin(ions)], self.levels_all)
         collisions = collisions.sort_values(by=["lower_level_id", "upper_level_id"])
 
         # `e_col_id` number starts after the last line id
         start = self.lines_all.index[-1] + 1
-        collisions["e_col_id"] = range(start, start + len(collisions))
-
-        # Exclude artificially created levels from levels
-        levels = exclude_artificial_levels(self.levels)
-
-        # Join atomic_number, ion_number, level_number_lower, level_number_upper
-        collisions = collisions.set_index(["atomic_number", "ion_number"])
-        lower_levels = levels.rename(
-            columns={
-                "level_number": "level_number_lower",
-                "g": "g_l",
-                "energy": "energy_lower",
-            }
-        ).loc[
-            :,
-            [
-                "atomic_number",
-                "ion_number",
-                "level_number_lower",
-                "g_l",
-                "energy_lower",
-            ],
-        ]
-
-        upper_levels = levels.rename(
-            columns={
-                "level_number": "level_number_upper",
-                "g": "g_u",
-                "energy": "energy_upper",
-            }
-        ).loc[:, ["level_number_upper", "g_u", "energy_upper"]]
-
-        collisions = collisions.join(lower_levels, on="lower_level_id").join(
-            upper_levels, on="upper_level_id"
-        )
+        collisions["e_col_id"] = np.arange(start, start + len(collisions), dtype=np.int64)
 
-        # Calculate delta_e
+        # Gather atomic_number, ion_number, level_number_lower, level_number_upper
+        levels = self.levels_by_id.loc[
+            :, ["atomic_number", "ion_number", "level_number", "g", "energy"]
+        ]
+        lower_levels = levels.reindex(collisions["lower_level_id"].to_numpy())
+        upper_levels = levels.reindex(collisions["upper_level_id"].to_numpy())
+
+        collisions["atomic_number"] = lower_levels["atomic_number"].to_numpy()
+        collisions["ion_number"] = lower_levels["ion_number"].to_numpy()
+        collisions["level_number_lower"] = lower_levels["level_number"].to_numpy()
+        collisions["g_l"] = lower_levels["g"].to_numpy()
+        collisions["energy_lower"] = lower_levels["energy"].to_numpy()
+        collisions["level_number_upper"] = upper_levels["level_number"].to_numpy()
+        collisions["g_u"] = upper_levels["g"].to_numpy()
+        collisions["energy_upper"] = upper_levels["energy"].to_numpy()
+
+        # Calculate delta_e and g_ratio in a single evaluation pass
         kb_ev = const.k_B.cgs.to("eV / K").value
-        collisions["delta_e"] = (
-            collisions["energy_upper"] - collisions["energy_lower"]
-        ) / kb_ev
-
-        # Calculate g_ratio
-        collisions["g_ratio"] = collisions["g_l"] / collisions["g_u"]
+        collisions.eval(
+            """
+            delta_e = (energy_upper - energy_lower) / @kb_ev
+            g_ratio = g_l / g_u
+            """,
+            inplace=True,
+        )
 
         # Derive columns for collisional strengths
         c_ul_temperature_cols = ["t{:06d}".format(t) for t in temperatures]
@@ -200,10 +183,8 @@ class ChiantiCollisionsPreparer(CollisionsPreparer):
             ]
         ]
 
-        collisional_ul_factors = collisions.apply(
-            calculate_collisional_strength,
-            axis=1,
-            args=(temperatures, kb_ev, c_ul_temperature_cols),
+        collisional_ul_factors = calculate_collisional_strength(
+            collisions, temperatures, kb_ev, c_ul_temperature_cols
         )
 
         collisions = pd.concat([collisions, collisional_ul_factors], axis=1)
@@ -211,51 +192,115 @@ class ChiantiCollisionsPreparer(CollisionsPreparer):
 
         return collisions
 
+def get_c_ul_temperature_cols(collisions):
+    """
+    Returns the sorted names of the collisional strength columns.
+
+    """
+    return sorted(
+        col for col in collisions.columns if C_UL_TEMPERATURE_COLUMN.match(str(col))
+    )
+
+
 def calculate_collisional_strength(
-        row, temperatures, kb_ev, c_ul_temperature_cols
+        collisions, temperatures, kb_ev, c_ul_temperature_cols
     ):
     """
     Function to calculation upsilon from Burgess & Tully 1992 (TType 1 - 4; Eq. 23 - 38).
 
+    The calculation is vectorized over all the rows of `collisions` and
+    all the `temperatures`.
+
+    Returns
+    -------
+    pandas.DataFrame
+
     """
 
-    c = row["cups"]
-    x_knots = np.linspace(0, 1, len(row["btemp"]))
-    y_knots = row["bscups"]
-    delta_e = row["delta_e"]
-    g_u = row["g_u"]
+    c = collisions["cups"].to_numpy()[:, np.newaxis]
+    delta_e = collisions["delta_e"].to_numpy()[:, np.newaxis]
+    g_u = collisions["g_u"].to_numpy()[:, np.newaxis]
 
-    ttype = row["ttype"]
-    if ttype > 5:
-        ttype -= 5
+    ttype = collisions["ttype"].to_numpy().copy()
+    ttype[ttype > 5] -= 5
 
-    kt = kb_ev * temperatures
+    if (ttype == 5).any():
+        raise ValueError("Not sure what to do with ttype=5")
 
-    spline_tck = interpolate.splrep(x_knots, y_knots)
+    kt_delta_e = kb_ev * temperatures / delta_e
 
-    if ttype == 1:
-        x = 1 - np.log(c) / np.log(kt / delta_e + c)
-        y_func = interpolate.splev(x, spline_tck)
-        upsilon = y_func * np.log(kt / delta_e + np.exp(1))
+    # Each formula is only evaluated on the rows of its transition type
+    log_rows = (ttype == 1) | (ttype == 4)
+    x = np.empty_like(kt_delta_e)
+    x[log_rows] = 1 - np.log(c[log_rows]) / np.log(
+        kt_delta_e[log_rows] + c[log_rows]
+    )
+    x[~log_rows] = kt_delta_e[~log_rows] / (kt_delta_e[~log_rows] + c[~log_rows])
 
-    elif ttype == 2:
-        x = (kt / delta_e) / (kt / delta_e + c)
-        y_func = interpolate.splev(x, spline_tck)
-        upsilon = y_func
+    y_func = _evaluate_splines(collisions["bscups"], x)
+    upsilon = np.full_like(y_func, np.nan)
 
-    elif ttype == 3:
-        x = (kt / delta_e) / (kt / delta_e + c)
-        y_func = interpolate.splev(x, spline_tck)
-        upsilon = y_func / (kt / delta_e + 1)
+    rows = ttype == 1
+    upsilon[rows] = y_func[rows] * np.log(kt_delta_e[rows] + np.exp(1))
 
-    elif ttype == 4:
-        x = 1 - np.log(c) / np.log(kt / delta_e + c)
-        y_func = interpolate.splev(x, spline_tck)
-        upsilon = y_func * np.log(kt / delta_e + c)
+    rows = ttype == 2
+    upsilon[rows] = y_func[rows]
 
-    elif ttype == 5:
-        raise ValueError("Not sure what to do with ttype=5")
+    rows = ttype == 3
+    upsilon[rows] = y_func[rows] / (kt_delta_e[rows] + 1)
+
+    rows = ttype == 4
+    upsilon[rows] = y_func[rows] * np.log(kt_delta_e[rows] + c[rows])
 
     #### 1992A&A...254..436B Equation 20 & 22 #####
     collisional_ul_factor = 8.63e-6 * upsilon / (g_u * temperatures**0.5)
-    return pd.Series(data=collisional_ul_factor, index=c_ul_temperature_cols)
\ No newline at end of file
+    return pd.DataFrame(
+        collisional_ul_factor, index=collisions.index, columns=c_ul_temperature_cols
+    )
+
+
+def _evaluate_splines(y_knots, x):
+    """
+    Evaluate the cubic splines interpolating `y_knots` on equally spaced
+    knots in [0, 1], one spline per row of `x`. Rows sharing the same
+    number of knots are fitted together. Values outside [0, 1] are
+    extrapolated, as `scipy.interpolate.splev` does.
+
+    Parameters
+    ----------
+    y_knots : pandas.Series
+        Spline values at the knots, one array per row.
+    x : numpy.ndarray
+        Points to evaluate, shape (rows, points).
+
+    Returns
+    -------
+    numpy.ndarray
+
+    """
+    y_knots = y_knots.to_numpy()
+    n_knots = np.array([len(y) for y in y_knots])
+    y_func = np.empty_like(x)
+
+    for n in np.unique(n_knots):
+        rows = np.flatnonzero(n_knots == n)
+        spline = interpolate.make_interp_spline(
+            np.linspace(0, 1, n), np.stack(y_knots[rows], axis=-1)
+        )
+
+        # Evaluate each polynomial piece in Horner form from its Taylor
+        # coefficients at the left breakpoint
+        breakpoints = np.unique(spline.t)[:-1]
+        piece = np.searchsorted(breakpoints, x[rows], side="right") - 1
+        piece = np.clip(piece, 0, len(breakpoints) - 1)
+        dx = x[rows] - breakpoints[piece]
+        column = np.arange(len(rows))[:, np.newaxis]
+
+        y = np.zeros_like(dx)
+        for order in range(spline.k, -1, -1):
+            coeff = spline(breakpoints, nu=order) / math.factorial(order)
+            y = y * dx + coeff[piece, column]
+
+        y_func[rows] = y
+
+    return y_func
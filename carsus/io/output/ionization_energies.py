@@ -1,4 +1,5 @@
 import copy
+import functools
 
 class IonizationEnergiesPreparer:
     def __init__(self, cmfgen_reader, ionization_energies):
@@ -15,7 +16,9 @@ class IonizationEnergiesPreparer:
             )
             self.ionization_energies = combined_ionization_energies
 
+    # replace with functools.cached_property with Python > 3.8
     @property
+    @functools.lru_cache()
     def ionization_energies_prepared(self):
         """
         Prepare the DataFrame with ionization energies for TARDIS.
@@ -25,8 +28,8 @@ class IonizationEnergiesPreparer:
         pandas.DataFrame
 
         """
-        ionization_energies_prepared = self.ionization_energies.base.copy()
-        ionization_energies_prepared = ionization_energies_prepared.reset_index()
+        # `reset_index` already returns a new object, no need to copy it
+        ionization_energies_prepared = self.ionization_energies.base.reset_index()
         ionization_energies_prepared["ion_charge"] += 1
         ionization_energies_prepared = ionization_energies_prepared.rename(
             columns={"ion_charge": "ion_number"}
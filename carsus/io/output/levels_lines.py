@@ -7,13 +7,21 @@ import numpy as np
 import pandas as pd
 
 from carsus.util import convert_atomic_number2symbol, convert_wavelength_air2vacuum
-from carsus.io.util import get_lvl_index2id, create_artificial_fully_ionized
+from carsus.io.util import (
+    get_lvl_index2id,
+    create_artificial_fully_ionized,
+    exclude_artificial_levels,
+)
 
 # Wavelengths above this value are given in air
 GFALL_AIR_THRESHOLD = 2000 * u.AA
 MEDIUM_AIR = 1
 MEDIUM_VACUUM = 0
 
+KAYSER_TO_EV = u.Unit("cm-1").to("eV", equivalencies=u.spectral())
+NM_TO_AA = u.nm.to("AA")
+C_AA_PER_S = const.c.to_value("AA/s")
+
 logger = logging.getLogger(__name__)
 
 class LevelsLinesPreparer:
@@ -42,15 +50,13 @@ class LevelsLinesPreparer:
 
         """
         levels = levels.set_index(["atomic_number", "ion_number"])
-        levels = levels.sort_index()  # To supress warnings
-
-        lvl_list = []
-        for ion in levels.index.unique():
-            max_priority = levels.loc[ion, "priority"].max()
-            lvl = levels.loc[ion][levels.loc[ion, "priority"] == max_priority]
-            lvl_list.append(lvl)
+        levels = levels.sort_index()  # Ions are returned sorted
 
-        levels_uq = pd.concat(lvl_list, sort=True)
+        # Keep the levels of the highest priority source of each ion
+        max_priority = levels.groupby(
+            level=["atomic_number", "ion_number"], sort=False
+        )["priority"].transform("max")
+        levels_uq = levels[levels["priority"] == max_priority]
         gfall_ions = levels_uq[levels_uq["ds_id"] == 2].index.unique()
         chianti_ions = levels_uq[levels_uq["ds_id"] == 4].index.unique()
         cmfgen_ions = levels_uq[levels_uq["ds_id"] == 5].index.unique()
@@ -69,7 +75,7 @@ class LevelsLinesPreparer:
         Parameters
         ----------
         levels : pandas.DataFrame
-           Energy levels dataframe.
+           Energy levels dataframe, indexed by `level_id`.
 
         lines : pandas.DataFrame
            Transition lines dataframe.
@@ -79,22 +85,47 @@ class LevelsLinesPreparer:
 
         """
         # Filter lines on the loggf threshold value
-        metastable_lines = lines.loc[lines["loggf"] > levels_metastable_loggf_threshold]
+        strong_lines = lines["loggf"].to_numpy() > levels_metastable_loggf_threshold
+        upper_level_ids = lines["upper_level_id"].to_numpy()[strong_lines]
 
-        # Count the remaining strong transitions
-        metastable_lines_grouped = metastable_lines.groupby("upper_level_id")
-        metastable_counts = metastable_lines_grouped["upper_level_id"].count()
-        metastable_counts.name = "metastable_counts"
+        # Count the remaining strong transitions per upper level
+        level_ids = levels.index.to_numpy()
+        metastable_counts = np.bincount(
+            upper_level_ids, minlength=level_ids.max(initial=0) + 1
+        )
 
-        # If there are no strong transitions for a level (the count is NaN)
-        # then the metastable flag is True else (the count is a natural number)
-        # the metastable flag is False
-        levels = levels.join(metastable_counts)
-        metastable_flags = levels["metastable_counts"].isnull()
-        metastable_flags.name = "metastable"
+        # If there are no strong transitions for a level then the metastable
+        # flag is True else the metastable flag is False
+        metastable_flags = pd.Series(
+            metastable_counts[level_ids] == 0, index=levels.index, name="metastable"
+        )
 
         return metastable_flags
     
+    def _get_priority_mask(self, df):
+        """
+        Returns a mask keeping the rows of Chianti and CMFGEN selected ions
+        only if they come from the selected source. Rows of other ions are
+        kept.
+
+        Parameters
+        ----------
+        df : pandas.DataFrame
+            With `atomic_number`, `ion_number` and `ds_id` columns.
+
+        Returns
+        -------
+        numpy.ndarray
+
+        """
+        ion_keys = pd.MultiIndex.from_arrays([df["atomic_number"], df["ion_number"]])
+        ds_id = df["ds_id"].to_numpy()
+
+        mask = ~((ds_id != 4) & ion_keys.isin(self.chianti_ions))
+        mask &= ~((ds_id != 5) & ion_keys.isin(self.cmfgen_ions))
+
+        return mask
+
     def ingest_multiple_sources(self, attribute):
         """Takes dataframes from multiple readers and merges them
 
@@ -122,7 +153,7 @@ class LevelsLinesPreparer:
             cmfgen["ds_id"] = 5
             sources.append(cmfgen)
         
-        return pd.concat(sources, sort=True)
+        return pd.concat(sources)
 
     # replace with functools.cached_property with Python > 3.8
     @property
@@ -146,19 +177,14 @@ class LevelsLinesPreparer:
         logger.info("Ingesting energy levels.")
         levels = self.ingest_multiple_sources("levels")
 
-        levels["g"] = 2 * levels["j"] + 1
-        levels["g"] = levels["g"].astype(np.int64)
+        levels["g"] = (2 * levels["j"].to_numpy() + 1).astype(np.int64)
         levels = levels.drop(columns=["j", "label", "method"])
         levels = levels.reset_index()
         levels = levels.rename(columns={"ion_charge": "ion_number"})
         levels = levels[
             ["atomic_number", "ion_number", "g", "energy", "ds_id", "priority"]
         ]
-        levels["energy"] = (
-            u.Quantity(levels["energy"], "cm-1")
-            .to("eV", equivalencies=u.spectral())
-            .value
-        )
+        levels["energy"] = levels["energy"].to_numpy() * KAYSER_TO_EV
 
         # Solve priorities and set attributes for later use.
         self.gfall_ions, self.chianti_ions, self.cmfgen_ions = self.solve_priorities(
@@ -184,7 +210,7 @@ class LevelsLinesPreparer:
         ground_levels = ground_levels.rename(columns={"ion_charge": "ion_number"})
         ground_levels["ds_id"] = 1
 
-        levels = pd.concat([ground_levels, levels], sort=True)
+        levels = pd.concat([ground_levels, levels])
         levels["level_id"] = range(1, len(levels) + 1)
         levels = levels.set_index("level_id")
 
@@ -200,21 +226,7 @@ class LevelsLinesPreparer:
         levels = levels[~mask]
 
         # Filter levels by priority
-        for ion in self.chianti_ions:
-            mask = (
-                (levels["ds_id"] != 4)
-                & (levels["atomic_number"] == ion[0])
-                & (levels["ion_number"] == ion[1])
-            )
-            levels = levels.drop(levels[mask].index)
-
-        for ion in self.cmfgen_ions:
-            mask = (
-                (levels["ds_id"] != 5)
-                & (levels["atomic_number"] == ion[0])
-                & (levels["ion_number"] == ion[1])
-            )
-            levels = levels.drop(levels[mask].index)
+        levels = levels[self._get_priority_mask(levels)]
 
         levels = levels[["atomic_number", "ion_number", "g", "energy", "ds_id"]]
         levels = levels.reset_index()
@@ -247,24 +259,8 @@ class LevelsLinesPreparer:
         lines["line_id"] = range(1, len(lines) + 1)
 
         # Filter lines by priority
-        for ion in self.chianti_ions:
-            mask = (
-                (lines["ds_id"] != 4)
-                & (lines["atomic_number"] == ion[0])
-                & (lines["ion_number"] == ion[1])
-            )
-            lines = lines.drop(lines[mask].index)
+        lines = lines[self._get_priority_mask(lines)]
 
-        for ion in self.cmfgen_ions:
-            mask = (
-                (lines["ds_id"] != 5)
-                & (lines["atomic_number"] == ion[0])
-                & (lines["ion_number"] == ion[1])
-            )
-            lines = lines.drop(lines[mask].index)
-
-        lines = lines.set_index(["atomic_number", "ion_number"])
-        lines = lines.sort_index()  # To supress warnings
         ions = (
             set(self.gfall_ions)
             .union(set(self.chianti_ions))
@@ -272,13 +268,11 @@ class LevelsLinesPreparer:
         )
 
         logger.info("Matching levels and lines.")
-        lns_list = [
-            get_lvl_index2id(lines.loc[ion], self.all_levels_data) for ion in ions
-        ]
-        lines = pd.concat(lns_list, sort=True)
+        ion_keys = pd.MultiIndex.from_arrays([lines["atomic_number"], lines["ion_number"]])
+        lines = get_lvl_index2id(lines[ion_keys.isin(list(ions))], self.all_levels_data)
         lines = lines.set_index("line_id").sort_index()
 
-        lines["loggf"] = np.log10(lines["gf"])
+        lines["loggf"] = np.log10(lines["gf"].to_numpy())
         lines = lines.drop(
             columns=[
                 "energy_upper",
@@ -290,18 +284,14 @@ class LevelsLinesPreparer:
             ]
         )
 
-        lines["wavelength"] = u.Quantity(lines["wavelength"], "nm").to("AA").value
-
-        lines.loc[lines["wavelength"] <= GFALL_AIR_THRESHOLD, "medium"] = MEDIUM_VACUUM
-
-        lines.loc[lines["wavelength"] > GFALL_AIR_THRESHOLD, "medium"] = MEDIUM_AIR
+        wavelength = lines["wavelength"].to_numpy() * NM_TO_AA
 
         # Chianti wavelengths are already given in vacuum
-        gfall_mask = lines["ds_id"] == 2
-        air_mask = lines["medium"] == MEDIUM_AIR
-        lines.loc[air_mask & gfall_mask, "wavelength"] = convert_wavelength_air2vacuum(
-            lines.loc[air_mask, "wavelength"]
+        air_mask = (wavelength > GFALL_AIR_THRESHOLD.to_value("AA")) & (
+            lines["ds_id"].to_numpy() == 2
         )
+        wavelength[air_mask] = convert_wavelength_air2vacuum(wavelength[air_mask])
+        lines["wavelength"] = wavelength
 
         lines = lines[
             ["lower_level_id", "upper_level_id", "wavelength", "gf", "loggf", "ds_id"]
@@ -309,7 +299,9 @@ class LevelsLinesPreparer:
 
         return lines
     
+    # replace with functools.cached_property with Python > 3.8
     @property
+    @functools.lru_cache()
     def levels_prepared(self):
         """
         Prepare the DataFrame with levels for TARDIS.
@@ -330,7 +322,7 @@ class LevelsLinesPreparer:
                 "g",
                 "metastable",
             ],
-        ].copy()
+        ]
 
         levels_prepared = levels_prepared.set_index(
             ["atomic_number", "ion_number", "level_number"]
@@ -338,7 +330,9 @@ class LevelsLinesPreparer:
 
         return levels_prepared
 
+    # replace with functools.cached_property with Python > 3.8
     @property
+    @functools.lru_cache()
     def lines_prepared(self):
         """
         Prepare the DataFrame with lines for TARDIS.
@@ -365,7 +359,7 @@ class LevelsLinesPreparer:
                 "B_ul",
                 "A_ul",
             ],
-        ].copy()
+        ]
 
         # TODO: store units in metadata
         # wavelength[angstrom], nu[Hz], f_lu[1], f_ul[1],
@@ -413,19 +407,18 @@ class LevelsLinesPreparer:
             < levels_w_ionization_energies["ionization_energy"]
         )
 
-        levels = levels_w_ionization_energies[mask].copy()
-        levels = levels.set_index("level_id").sort_values(
-            by=["atomic_number", "ion_number"]
-        )
-        levels = levels.drop(columns="ionization_energy")
+        # `ionization_energy` is left out by the final column selection
+        levels = levels_w_ionization_energies[mask].set_index("level_id")
 
-        # Clean lines
-        lines = self.all_lines_data.join(
-            pd.DataFrame(index=levels.index), on="lower_level_id", how="inner"
-        ).join(pd.DataFrame(index=levels.index), on="upper_level_id", how="inner")
+        # Clean lines, keep only those between remaining levels
+        lines = self.all_lines_data
+        lines = lines[
+            lines["lower_level_id"].isin(levels.index)
+            & lines["upper_level_id"].isin(levels.index)
+        ]
 
         # Culling lines with low gf values
-        lines = lines.loc[lines["loggf"] > lines_loggf_threshold]
+        lines = lines.loc[lines["loggf"].to_numpy() > lines_loggf_threshold]
 
         # Do not clean levels that don't exist in lines
 
@@ -434,17 +427,16 @@ class LevelsLinesPreparer:
             levels, self.all_lines_data, levels_metastable_loggf_threshold
         )
 
-        # Create levels numbers
+        # Create levels numbers. Sorting on several keys is stable, ties keep
+        # the `level_id` order
         levels = levels.sort_values(["atomic_number", "ion_number", "energy", "g"])
 
         levels["level_number"] = (
-            levels.groupby(["atomic_number", "ion_number"])["energy"]
-            .transform(lambda x: np.arange(len(x)))
-            .values
+            levels.groupby(["atomic_number", "ion_number"], sort=False)
+            .cumcount()
+            .astype(np.int64)
         )
 
-        levels["level_number"] = levels["level_number"].astype(np.int64)
-
         levels = levels[
             [
                 "atomic_number",
@@ -457,18 +449,18 @@ class LevelsLinesPreparer:
             ]
         ]
 
-        # Join atomic_number, ion_number, level_number_lower,
-        # level_number_upper on lines
-        lower_levels = levels.rename(
-            columns={"level_number": "level_number_lower", "g": "g_l"}
-        ).loc[:, ["atomic_number", "ion_number", "level_number_lower", "g_l"]]
-
-        upper_levels = levels.rename(
-            columns={"level_number": "level_number_upper", "g": "g_u"}
-        ).loc[:, ["level_number_upper", "g_u"]]
-
-        lines = lines.join(lower_levels, on="lower_level_id").join(
-            upper_levels, on="upper_level_id"
+        # Gather atomic_number, ion_number, level_number_lower,
+        # level_number_upper, g_l and g_u for lines
+        lower_levels = levels.reindex(lines["lower_level_id"].to_numpy())
+        upper_levels = levels.reindex(lines["upper_level_id"].to_numpy())
+
+        lines = lines.assign(
+            atomic_number=lower_levels["atomic_number"].to_numpy(),
+            ion_number=lower_levels["ion_number"].to_numpy(),
+            level_number_lower=lower_levels["level_number"].to_numpy(),
+            g_l=lower_levels["g"].to_numpy(),
+            level_number_upper=upper_levels["level_number"].to_numpy(),
+            g_u=upper_levels["g"].to_numpy(),
         )
 
         # Calculate absorption oscillator strength f_lu and emission
@@ -477,7 +469,7 @@ class LevelsLinesPreparer:
         lines["f_ul"] = lines["gf"] / lines["g_u"]
 
         # Calculate frequency
-        lines["nu"] = u.Quantity(lines["wavelength"], "AA").to("Hz", u.spectral()).value
+        lines["nu"] = C_AA_PER_S / lines["wavelength"].to_numpy()
 
         # Create Einstein coefficients
         create_einstein_coeff(lines)
@@ -495,6 +487,9 @@ class LevelsLinesPreparer:
         self.levels = levels
         self.lines = lines
 
+        # Real levels indexed by `level_id`, shared by the other preparers
+        self.levels_by_id = exclude_artificial_levels(levels)
+
 def create_einstein_coeff(lines):
     """
     Create Einstein coefficients columns for the `lines` DataFrame.
@@ -509,18 +504,14 @@ def create_einstein_coeff(lines):
         const.m_e.cgs.value * const.c.cgs.value
     )
 
-    lines["B_lu"] = (
-        einstein_coeff * lines["f_lu"] / (const.h.cgs.value * lines["nu"])
-    )
+    # Work on the underlying arrays, `nu` and `f_ul` are shared by the
+    # three coefficients
+    nu = lines["nu"].to_numpy()
+    f_ul = lines["f_ul"].to_numpy()
+    h_nu = const.h.cgs.value * nu
 
-    lines["B_ul"] = (
-        einstein_coeff * lines["f_ul"] / (const.h.cgs.value * lines["nu"])
-    )
+    lines["B_lu"] = einstein_coeff * lines["f_lu"].to_numpy() / h_nu
 
-    lines["A_ul"] = (
-        2
-        * einstein_coeff
-        * lines["nu"] ** 2
-        / const.c.cgs.value**2
-        * lines["f_ul"]
-    )
+    lines["B_ul"] = einstein_coeff * f_ul / h_nu
+
+    lines["A_ul"] = 2 * einstein_coeff * nu**2 / const.c.cgs.value**2 * f_ul
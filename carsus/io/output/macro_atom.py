@@ -1,3 +1,5 @@
+import functools
+
 import numpy as np
 import pandas as pd
 
@@ -27,93 +29,40 @@ class MacroAtomPreparer():
         # Exclude artificially created levels from levels
         levels = exclude_artificial_levels(self.levels)
 
-        lvl_energy_lower = levels.rename(columns={"energy": "energy_lower"}).loc[
-            :, ["energy_lower"]
-        ]
-
-        lvl_energy_upper = levels.rename(columns={"energy": "energy_upper"}).loc[
-            :, ["energy_upper"]
-        ]
-
         lines = self.lines.set_index("line_id")
-        lines = lines.join(lvl_energy_lower, on="lower_level_id").join(
-            lvl_energy_upper, on="upper_level_id"
+        e_lower = levels["energy"].reindex(lines["lower_level_id"].to_numpy()).to_numpy()
+        e_upper = levels["energy"].reindex(lines["upper_level_id"].to_numpy()).to_numpy()
+
+        nu = lines["nu"].to_numpy()
+        f_ul, f_lu = lines["f_ul"].to_numpy(), lines["f_lu"].to_numpy()
+        level_number_lower = lines["level_number_lower"].to_numpy()
+        level_number_upper = lines["level_number_upper"].to_numpy()
+
+        p_emission_down = 2 * nu**2 * f_ul / const.c.cgs.value**2 * (e_upper - e_lower)
+        p_internal_down = 2 * nu**2 * f_ul / const.c.cgs.value**2 * e_lower
+        p_internal_up = f_lu * e_lower / (const.h.cgs.value * nu)
+
+        # Three transitions per line, stored next to each other in the
+        # order: emission down, internal down and internal up
+        macro_atom = pd.DataFrame(
+            {
+                "atomic_number": np.repeat(lines["atomic_number"].to_numpy(), 3),
+                "ion_number": np.repeat(lines["ion_number"].to_numpy(), 3),
+                "source_level_number": np.column_stack(
+                    [level_number_upper, level_number_upper, level_number_lower]
+                ).ravel(),
+                "target_level_number": np.column_stack(
+                    [level_number_lower, level_number_lower, level_number_upper]
+                ).ravel(),
+                "transition_line_id": np.repeat(lines.index.to_numpy(), 3),
+                "transition_type": np.tile(
+                    [P_EMISSION_DOWN, P_INTERNAL_DOWN, P_INTERNAL_UP], len(lines)
+                ),
+                "transition_probability": np.column_stack(
+                    [p_emission_down, p_internal_down, p_internal_up]
+                ).ravel(),
+            }
         )
-
-        macro_atom = list()
-        macro_atom_dtype = [
-            ("atomic_number", np.int64),
-            ("ion_number", np.int64),
-            ("source_level_number", np.int64),
-            ("target_level_number", np.int64),
-            ("transition_line_id", np.int64),
-            ("transition_type", np.int64),
-            ("transition_probability", np.float64),
-        ]
-
-        for line_id, row in lines.iterrows():
-            atomic_number, ion_number = row["atomic_number"], row["ion_number"]
-            level_number_lower, level_number_upper = (
-                row["level_number_lower"],
-                row["level_number_upper"],
-            )
-            nu = row["nu"]
-            f_ul, f_lu = row["f_ul"], row["f_lu"]
-            e_lower, e_upper = row["energy_lower"], row["energy_upper"]
-
-            transition_probabilities_dict = dict()
-
-            transition_probabilities_dict[P_EMISSION_DOWN] = (
-                2 * nu**2 * f_ul / const.c.cgs.value**2 * (e_upper - e_lower)
-            )
-
-            transition_probabilities_dict[P_INTERNAL_DOWN] = (
-                2 * nu**2 * f_ul / const.c.cgs.value**2 * e_lower
-            )
-
-            transition_probabilities_dict[P_INTERNAL_UP] = (
-                f_lu * e_lower / (const.h.cgs.value * nu)
-            )
-
-            macro_atom.append(
-                (
-                    atomic_number,
-                    ion_number,
-                    level_number_upper,
-                    level_number_lower,
-                    line_id,
-                    P_EMISSION_DOWN,
-                    transition_probabilities_dict[P_EMISSION_DOWN],
-                )
-            )
-
-            macro_atom.append(
-                (
-                    atomic_number,
-                    ion_number,
-                    level_number_upper,
-                    level_number_lower,
-                    line_id,
-                    P_INTERNAL_DOWN,
-                    transition_probabilities_dict[P_INTERNAL_DOWN],
-                )
-            )
-
-            macro_atom.append(
-                (
-                    atomic_number,
-                    ion_number,
-                    level_number_lower,
-                    level_number_upper,
-                    line_id,
-                    P_INTERNAL_UP,
-                    transition_probabilities_dict[P_INTERNAL_UP],
-                )
-            )
-
-        macro_atom = np.array(macro_atom, dtype=macro_atom_dtype)
-        macro_atom = pd.DataFrame(macro_atom)
-
         macro_atom = macro_atom.sort_values(
             ["atomic_number", "ion_number", "source_level_number"]
         )
@@ -126,40 +75,35 @@ class MacroAtomPreparer():
         """
         macro_atom_references = self.levels.rename(
             columns={"level_number": "source_level_number"}
-        ).loc[:, ["atomic_number", "ion_number", "source_level_number", "level_id"]]
-
-        count_down = self.lines.groupby("upper_level_id").size()
-        count_down.name = "count_down"
+        ).loc[:, ["atomic_number", "ion_number", "source_level_number"]]
 
-        count_up = self.lines.groupby("lower_level_id").size()
-        count_up.name = "count_up"
-
-        macro_atom_references = macro_atom_references.join(
-            count_down, on="level_id"
-        ).join(count_up, on="level_id")
-        macro_atom_references = macro_atom_references.drop("level_id", axis=1)
-
-        macro_atom_references = macro_atom_references.fillna(0)
+        # Count the transitions per level id, artificial levels (-1) have none
+        level_ids = self.levels["level_id"].to_numpy()
+        minlength = level_ids.max(initial=0) + 1
+        count_down = np.bincount(
+            self.lines["upper_level_id"].to_numpy(), minlength=minlength
+        )
+        count_up = np.bincount(
+            self.lines["lower_level_id"].to_numpy(), minlength=minlength
+        )
+        real_levels = level_ids != -1
+
+        macro_atom_references["count_down"] = np.where(
+            real_levels, count_down[level_ids], 0
+        ).astype(np.int64)
+        macro_atom_references["count_up"] = np.where(
+            real_levels, count_up[level_ids], 0
+        ).astype(np.int64)
         macro_atom_references["count_total"] = (
             2 * macro_atom_references["count_down"] + macro_atom_references["count_up"]
         )
 
-        macro_atom_references["count_down"] = macro_atom_references[
-            "count_down"
-        ].astype(np.int64)
-
-        macro_atom_references["count_up"] = macro_atom_references["count_up"].astype(
-            np.int64
-        )
-
-        macro_atom_references["count_total"] = macro_atom_references[
-            "count_total"
-        ].astype(np.int64)
-
         self.macro_atom_references = macro_atom_references
 
 
+    # replace with functools.cached_property with Python > 3.8
     @property
+    @functools.lru_cache()
     def macro_atom_prepared(self):
         """
         Prepare the DataFrame with macro atom data for TARDIS
@@ -185,7 +129,7 @@ class MacroAtomPreparer():
                 "transition_probability",
                 "transition_line_id",
             ],
-        ].copy()
+        ]
 
         macro_atom_prepared = macro_atom_prepared.rename(
             columns={"target_level_number": "destination_level_number"}
@@ -195,7 +139,9 @@ class MacroAtomPreparer():
 
         return macro_atom_prepared
 
+    # replace with functools.cached_property with Python > 3.8
     @property
+    @functools.lru_cache()
     def macro_atom_references_prepared(self):
         """
         Prepare the DataFrame with macro atom references for TARDIS
@@ -215,7 +161,7 @@ class MacroAtomPreparer():
                 "count_up",
                 "count_total",
             ],
-        ].copy()
+        ]
 
         macro_atom_references_prepared = macro_atom_references_prepared.set_index(
             ["atomic_number", "ion_number", "source_level_number"]
@@ -2,15 +2,18 @@ import functools
 import logging
 
 import astropy.units as u
-import pandas as pd
+import numpy as np
 
-from carsus.io.util import get_lvl_index2id, exclude_artificial_levels
+from carsus.io.util import get_lvl_index2id
 
 logger = logging.getLogger(__name__)
 
+RYD_TO_HZ = u.rydberg.to("Hz", equivalencies=u.spectral())
+MBARN_TO_CM2 = u.Mbarn.to("cm2")
+
 class PhotoIonizationPreparer:
-    def __init__(self, levels, levels_all, lines_all, cmfgen_reader, cmfgen_ions):
-        self.levels = levels
+    def __init__(self, levels_by_id, levels_all, lines_all, cmfgen_reader, cmfgen_ions):
+        self.levels_by_id = levels_by_id
         self.levels_all = levels_all
         self.lines_all = lines_all
         self.cmfgen_reader = cmfgen_reader
@@ -38,12 +41,10 @@ class PhotoIonizationPreparer:
 
         cross_sections["level_index_lower"] = cross_sections["level_index"].values
         cross_sections["level_index_upper"] = cross_sections["level_index"].values
-        phixs_list = [
-            get_lvl_index2id(cross_sections.loc[ion], self.levels_all)
-            for ion in self.cmfgen_ions
-        ]
-
-        cross_sections = pd.concat(phixs_list, sort=True)
+        cross_sections = get_lvl_index2id(
+            cross_sections[cross_sections.index.isin(self.cmfgen_ions)],
+            self.levels_all,
+        )
         cross_sections = cross_sections.sort_values(
             by=["lower_level_id", "upper_level_id"]
         )
@@ -51,20 +52,18 @@ class PhotoIonizationPreparer:
 
         # `x_sect_id` number starts after the last `line_id`, just a convention
         start = self.lines_all.index[-1] + 1
-        cross_sections["x_sect_id"] = range(start, start + len(cross_sections))
+        cross_sections["x_sect_id"] = np.arange(
+            start, start + len(cross_sections), dtype=np.int64
+        )
 
-        # Exclude artificially created levels from levels
-        levels = exclude_artificial_levels(self.levels)
-        level_number = levels.loc[:, ["level_number"]]
+        level_number = self.levels_by_id.loc[:, ["level_number"]]
         cross_sections = cross_sections.join(level_number, on="level_id")
 
         # Levels are already cleaned, just drop the NaN's after join
         cross_sections = cross_sections.dropna()
 
-        cross_sections["energy"] = u.Quantity(cross_sections["energy"], "Ry").to(
-            "Hz", equivalencies=u.spectral()
-        ).value
-        cross_sections["sigma"] = u.Quantity(cross_sections["sigma"], "Mbarn").to("cm2").value
+        cross_sections["energy"] = cross_sections["energy"].to_numpy() * RYD_TO_HZ
+        cross_sections["sigma"] = cross_sections["sigma"].to_numpy() * MBARN_TO_CM2
         cross_sections["level_number"] = cross_sections["level_number"].astype("int")
         cross_sections = cross_sections.rename(
             columns={"energy": "nu", "sigma": "x_sect"}
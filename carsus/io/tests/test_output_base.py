@@ -0,0 +1,578 @@
+import hashlib
+from types import SimpleNamespace
+
+import astropy.constants as const
+import numpy as np
+import pandas as pd
+import pytest
+
+from carsus import FORMAT_VERSION
+from carsus.io.output import TARDISAtomData, base
+from carsus.io.output.base import (
+    DOWNCAST_INT_DTYPES,
+    FLOAT64_COLUMNS,
+    _downcast_dtypes,
+    _to_columnar_frame,
+)
+from carsus.io.tests.test_output_collisions import reference_collisional_strength
+from carsus.util import hash_pandas_object, update_hash_pandas_object
+
+IONS = [(1, 0), (2, 0), (2, 1)]
+
+# Column and index dtypes written by `to_hdf(..., downcast=True)`
+DOWNCAST_DTYPES = {
+    "/levels_data": (
+        {"energy": np.float64, "g": np.uint16, "metastable": np.bool_},
+        [np.uint8, np.uint8, np.uint16],
+    ),
+    "/lines_data": (
+        {
+            "line_id": np.int64,
+            "wavelength": np.float64,
+            "f_ul": np.float32,
+            "f_lu": np.float32,
+            "nu": np.float64,
+            "B_lu": np.float32,
+            "B_ul": np.float32,
+            "A_ul": np.float32,
+        },
+        [np.uint8, np.uint8, np.uint16, np.uint16],
+    ),
+    "/macro_atom_data": (
+        {
+            "atomic_number": np.uint8,
+            "ion_number": np.uint8,
+            "source_level_number": np.uint16,
+            "destination_level_number": np.uint16,
+            "transition_type": np.int64,
+            "transition_probability": np.float32,
+            "transition_line_id": np.int64,
+        },
+        [np.int64],
+    ),
+    "/macro_atom_references": (
+        {"count_down": np.int64, "count_up": np.int64, "count_total": np.int64},
+        [np.uint8, np.uint8, np.uint16],
+    ),
+}
+
+
+def make_levels_lines(ions, n_levels, priority, seed):
+    """
+    Levels and lines shaped like the `levels` and `lines` attributes of
+    the GFALL, Chianti and CMFGEN readers.
+
+    """
+    rng = np.random.default_rng(seed)
+    levels, lines = [], []
+
+    for atomic_number, ion_charge in ions:
+        energy = np.sort(rng.uniform(0, 1e5, n_levels))
+        energy[0] = 0.0
+        j = rng.integers(0, 4, n_levels) / 2
+
+        levels.append(
+            pd.DataFrame(
+                {
+                    "atomic_number": atomic_number,
+                    "ion_charge": ion_charge,
+                    "level_index": np.arange(n_levels),
+                    "energy": energy,
+                    "j": j,
+                    "label": "x",
+                    "method": "meas",
+                    "priority": priority,
+                }
+            )
+        )
+
+        lower, upper = np.triu_indices(n_levels, k=1)
+        lines.append(
+            pd.DataFrame(
+                {
+                    "atomic_number": atomic_number,
+                    "ion_charge": ion_charge,
+                    "level_index_lower": lower,
+                    "level_index_upper": upper,
+                    "energy_lower": energy[lower],
+                    "energy_upper": energy[upper],
+                    "j_lower": j[lower],
+                    "j_upper": j[upper],
+                    "wavelength": rng.uniform(50, 500, len(lower)),
+                    "gf": 10 ** rng.uniform(-4, 0, len(lower)),
+                }
+            )
+        )
+
+    levels = pd.concat(levels).set_index(["atomic_number", "ion_charge", "level_index"])
+    lines = pd.concat(lines).set_index(
+        ["atomic_number", "ion_charge", "level_index_lower", "level_index_upper"]
+    )
+
+    return levels, lines
+
+
+@pytest.fixture
+def gfall_reader():
+    levels, lines = make_levels_lines(IONS, 5, 10, seed=1)
+    return SimpleNamespace(levels=levels, lines=lines, version="gfall")
+
+
+@pytest.fixture
+def ionization_energies():
+    index = pd.MultiIndex.from_tuples(IONS, names=["atomic_number", "ion_charge"])
+
+    def get_ground_levels():
+        return pd.DataFrame(
+            {
+                "atomic_number": [ion[0] for ion in IONS],
+                "ion_charge": [ion[1] for ion in IONS],
+                "g": 1,
+                "energy": 0.0,
+            }
+        )
+
+    return SimpleNamespace(
+        base=pd.Series([13.6, 24.6, 54.4], index=index, name="ionization_energy"),
+        get_ground_levels=get_ground_levels,
+        version="nist_spectra",
+    )
+
+
+@pytest.fixture
+def atomic_weights():
+    base = pd.DataFrame(
+        {"atomic_number": [1, 2], "mass": [1.008, 4.003]}
+    ).set_index("atomic_number")
+    return SimpleNamespace(base=base, version="nist_weights")
+
+
+@pytest.fixture
+def zeta_data():
+    index = pd.MultiIndex.from_tuples(IONS, names=["atomic_number", "ion_charge"])
+    columns = pd.Index(np.arange(2000, 42000, 2000, dtype=np.float64), name="temp")
+    base = pd.DataFrame(
+        np.linspace(0, 1, len(index) * len(columns)).reshape(len(index), -1),
+        index=index,
+        columns=columns,
+    )
+    return SimpleNamespace(base=base, version="zeta")
+
+
+@pytest.fixture
+def atom_data(atomic_weights, ionization_energies, gfall_reader, zeta_data):
+    return TARDISAtomData(atomic_weights, ionization_energies, gfall_reader, zeta_data)
+
+
+def test_to_hdf_keys(atom_data, tmp_path):
+    fname = tmp_path / "atom_data.h5"
+    atom_data.to_hdf(fname)
+
+    with pd.HDFStore(fname, "r") as f:
+        keys = set(f.keys())
+
+    assert keys == {
+        "/atom_data",
+        "/ionization_data",
+        "/zeta_data",
+        "/levels_data",
+        "/lines_data",
+        "/macro_atom_data",
+        "/macro_atom_references",
+        "/lines_metadata",
+        "/metadata",
+    }
+
+
+def test_to_hdf_missing_required_data_raises(
+    atomic_weights, ionization_energies, zeta_data, tmp_path
+):
+    levels, _ = make_levels_lines(IONS, 5, 10, seed=1)
+    gfall_reader = SimpleNamespace(levels=levels, version="gfall")
+    atom_data = TARDISAtomData(
+        atomic_weights, ionization_energies, gfall_reader, zeta_data
+    )
+    fname = tmp_path / "atom_data.h5"
+
+    with pytest.raises(AttributeError):
+        atom_data.to_hdf(fname)
+
+    assert not fname.exists()
+
+
+def test_to_hdf_checksums(atom_data, tmp_path):
+    fname = tmp_path / "atom_data.h5"
+    atom_data.to_hdf(fname)
+
+    with pd.HDFStore(fname, "r") as f:
+        md5sums = f["/metadata"].loc["md5sum", "value"]
+        total_checksum = hashlib.md5()
+
+        for key in f.keys():
+            if key == "/metadata":
+                continue
+
+            update_hash_pandas_object(f[key], total_checksum)
+            assert md5sums[key.lstrip("/")] == hash_pandas_object(f[key])
+
+        assert f.root._v_attrs["MD5"] == total_checksum.hexdigest()
+
+
+def test_to_hdf_collisions_error_raises(
+    atomic_weights, ionization_energies, gfall_reader, zeta_data, tmp_path
+):
+    levels, lines = make_levels_lines([(2, 1)], 4, 30, seed=2)
+    collisions = lines.loc[:, ["gf"]].rename(columns={"gf": "t002000"})
+
+    # Reader without `collisional_metadata`
+    cmfgen_reader = SimpleNamespace(
+        levels=levels, lines=lines, collisions=collisions, version="cmfgen"
+    )
+    atom_data = TARDISAtomData(
+        atomic_weights,
+        ionization_energies,
+        gfall_reader,
+        zeta_data,
+        cmfgen_reader=cmfgen_reader,
+    )
+
+    with pytest.raises(AttributeError):
+        atom_data.collisions_prepared
+
+    with pytest.raises(AttributeError):
+        atom_data.to_hdf(tmp_path / "atom_data.h5")
+
+
+@pytest.fixture
+def chianti_reader():
+    levels, lines = make_levels_lines([(2, 1)], 4, 20, seed=3)
+
+    rng = np.random.default_rng(4)
+    n_knots = [5, 9, 5, 9]
+    index = pd.MultiIndex.from_tuples(
+        [(2, 1, 0, 1), (2, 1, 0, 2), (2, 1, 1, 3), (2, 1, 2, 3)],
+        names=lines.index.names,
+    )
+    collisions = pd.DataFrame(
+        {
+            "temperatures": [np.linspace(0, 1, n) for n in n_knots],
+            "collision_strengths": [rng.uniform(0.1, 2, n) for n in n_knots],
+            "gf": 0.1,
+            "energy": 0.0,
+            "ttype": [1, 2, 3, 9],
+            "cups": [1.0, 2.0, 3.0, 4.0],
+        },
+        index=index,
+    )
+
+    return SimpleNamespace(
+        levels=levels, lines=lines, collisions=collisions, version="chianti"
+    )
+
+
+def test_chianti_collisions_prepared(
+    atomic_weights, ionization_energies, gfall_reader, zeta_data, chianti_reader
+):
+    levels = chianti_reader.levels.copy()
+    collisions = chianti_reader.collisions.copy()
+    atom_data = TARDISAtomData(
+        atomic_weights,
+        ionization_energies,
+        gfall_reader,
+        zeta_data,
+        chianti_reader=chianti_reader,
+    )
+    prepared = atom_data.collisions_prepared
+
+    # 3 GFALL ions and 1 Chianti ion with 10 and 6 lines, ids start at 1
+    assert list(atom_data.collisions_preparer.collisions.index) == [37, 38, 39, 40]
+
+    # Chianti levels are sorted by energy, so level numbers match the indices
+    assert prepared.index.names == [
+        "atomic_number",
+        "ion_number",
+        "level_number_lower",
+        "level_number_upper",
+    ]
+    assert list(prepared.index) == list(collisions.index)
+
+    level_index = collisions.index.to_frame(index=False)
+    lower = levels.loc[(2, 1)].loc[level_index["level_index_lower"]]
+    upper = levels.loc[(2, 1)].loc[level_index["level_index_upper"]]
+
+    hc_k = (const.h * const.c / const.k_B).to("cm K").value
+    delta_e = (upper["energy"].to_numpy() - lower["energy"].to_numpy()) * hc_k
+    g_l = 2 * lower["j"].to_numpy() + 1
+    g_u = 2 * upper["j"].to_numpy() + 1
+
+    np.testing.assert_allclose(prepared["delta_e"], delta_e, rtol=1e-8)
+    np.testing.assert_allclose(prepared["g_ratio"], g_l / g_u)
+
+    for i, row in enumerate(collisions.itertuples()):
+        expected = reference_collisional_strength(
+            {
+                "btemp": row.temperatures,
+                "bscups": row.collision_strengths,
+                "ttype": row.ttype,
+                "cups": row.cups,
+                "delta_e": delta_e[i],
+                "g_u": g_u[i],
+            }
+        )
+        np.testing.assert_allclose(prepared["t002000"].iloc[i], expected[0], rtol=1e-8)
+
+
+@pytest.fixture
+def cmfgen_reader():
+    levels, lines = make_levels_lines([(2, 1)], 4, 30, seed=5)
+
+    # The (2, 0) rows belong to a GFALL ion and must be left out
+    index = pd.MultiIndex.from_tuples(
+        [(2, 1, 0)] * 3 + [(2, 1, 2)] * 3 + [(2, 0, 0)],
+        names=["atomic_number", "ion_charge", "level_index"],
+    )
+    cross_sections = pd.DataFrame(
+        {
+            "energy": [1.0, 2.0, 4.0, 0.5, 1.0, 2.0, 1.0],
+            "sigma": [3.0, 1.5, 0.5, 8.0, 4.0, 2.0, 1.0],
+        },
+        index=index,
+    )
+
+    return SimpleNamespace(
+        levels=levels, lines=lines, cross_sections=cross_sections, version="cmfgen"
+    )
+
+
+def test_cmfgen_cross_sections_prepared(
+    atomic_weights, ionization_energies, gfall_reader, zeta_data, cmfgen_reader
+):
+    atom_data = TARDISAtomData(
+        atomic_weights,
+        ionization_energies,
+        gfall_reader,
+        zeta_data,
+        cmfgen_reader=cmfgen_reader,
+    )
+    prepared = atom_data.cross_sections_prepared
+
+    assert prepared.index.names == ["atomic_number", "ion_number", "level_number"]
+    assert list(prepared.index) == [(2, 1, 0)] * 3 + [(2, 1, 2)] * 3
+    assert list(prepared.columns) == ["nu", "x_sect"]
+
+    # 1 Ry = 3.2898419603e15 Hz, 1 Mbarn = 1e-18 cm2
+    np.testing.assert_allclose(
+        prepared["nu"],
+        np.array([1.0, 2.0, 4.0, 0.5, 1.0, 2.0]) * 3.2898419603e15,
+        rtol=1e-10,
+    )
+    np.testing.assert_allclose(
+        prepared["x_sect"], np.array([3.0, 1.5, 0.5, 8.0, 4.0, 2.0]) * 1e-18
+    )
+
+    # 3 GFALL ions and 1 CMFGEN ion with 10 and 6 lines, ids start at 1
+    assert list(atom_data.cross_sections["x_sect_id"]) == list(range(37, 43))
+
+
+def test_downcast_dtypes():
+    index = pd.MultiIndex.from_arrays(
+        [[1, 1, 26], [0, 1, 25], [0, 300, 70000]],
+        names=["atomic_number", "ion_number", "line_id"],
+    )
+    df = pd.DataFrame(
+        {
+            "level_number": [0, 5, 4000],
+            "g": [1, 2, 300],
+            "level_id": [-1, 5, 7],
+            "energy": [0.0, 1.5, 2.5],
+            "gf": [0.1, 0.2, 0.3],
+            "label": ["a", "b", "c"],
+        },
+        index=index,
+    )
+    downcast = _downcast_dtypes(df)
+
+    assert downcast.dtypes.to_dict() == {
+        "level_number": np.uint16,
+        "g": np.uint16,
+        "level_id": np.int64,
+        "energy": np.float64,
+        "gf": np.float32,
+        "label": object,
+    }
+    assert [level.dtype for level in downcast.index.levels] == [
+        np.uint8,
+        np.uint8,
+        np.int64,
+    ]
+    assert downcast.index.names == df.index.names
+    np.testing.assert_array_equal(downcast.index.to_frame(), df.index.to_frame())
+    np.testing.assert_array_equal(downcast["level_number"], df["level_number"])
+    np.testing.assert_allclose(downcast["gf"], df["gf"], rtol=1e-7)
+
+    # The input is left untouched
+    assert df["level_number"].dtype == np.int64
+    assert df.index.levels[0].dtype == np.int64
+
+
+def test_downcast_dtypes_index_and_empty():
+    df = pd.DataFrame(
+        {"count_total": [1, 2]}, index=pd.Index([1, 26], name="atomic_number")
+    )
+    downcast = _downcast_dtypes(df)
+    assert downcast.index.dtype == np.uint8
+    assert downcast["count_total"].dtype == np.int64
+
+    level_id = pd.DataFrame({"g": [1, 2]}, index=pd.Index([-1, 300], name="level_id"))
+    assert _downcast_dtypes(level_id).index.dtype == np.int64
+
+    empty = _downcast_dtypes(pd.DataFrame({"g": np.array([], dtype=np.int64)}))
+    assert empty["g"].dtype == DOWNCAST_INT_DTYPES["g"]
+    assert len(empty) == 0
+
+    series = pd.Series([1.0, 2.0])
+    assert _downcast_dtypes(series) is series
+
+
+@pytest.mark.parametrize(
+    "df",
+    [
+        pd.DataFrame({"level_number": [-1, 0]}),
+        pd.DataFrame({"g": [1, 70000]}),
+        pd.DataFrame({"g": [1]}, index=pd.Index([256], name="atomic_number")),
+    ],
+)
+def test_downcast_dtypes_out_of_range_raises(df):
+    with pytest.raises(ValueError):
+        _downcast_dtypes(df)
+
+
+def test_to_hdf_downcast(atom_data, tmp_path):
+    atom_data.to_hdf(tmp_path / "full.h5")
+    atom_data.to_hdf(tmp_path / "downcast.h5", downcast=True)
+
+    with pd.HDFStore(tmp_path / "full.h5", "r") as full, pd.HDFStore(
+        tmp_path / "downcast.h5", "r"
+    ) as downcast:
+        keys = set(full.keys()) - {"/metadata"}
+        assert set(downcast.keys()) - {"/metadata"} == keys
+
+        for key in keys:
+            expected, result = full[key], downcast[key]
+            if not isinstance(expected, pd.DataFrame):
+                continue
+
+            for col in expected.columns:
+                if expected[col].dtype == np.int64:
+                    np.testing.assert_array_equal(result[col], expected[col])
+
+                elif expected[col].dtype == np.float64:
+                    if col in FLOAT64_COLUMNS:
+                        assert result[col].dtype == np.float64
+                        np.testing.assert_array_equal(result[col], expected[col])
+                    else:
+                        assert result[col].dtype == np.float32
+                        np.testing.assert_allclose(
+                            result[col], expected[col], rtol=1e-6
+                        )
+
+            assert result.index.names == expected.index.names
+            np.testing.assert_array_equal(
+                result.index.to_frame(), expected.index.to_frame()
+            )
+
+        for key, (columns, index) in DOWNCAST_DTYPES.items():
+            result = downcast[key]
+            assert result.dtypes.to_dict() == columns
+            assert list(result.index.to_frame().dtypes) == index
+
+
+def test_to_columnar_frame_series():
+    metadata = pd.Series(
+        {"temperatures": np.arange(2000, 6000, 2000), "dataset": ["chianti"], "info": None}
+    )
+    frame = _to_columnar_frame(metadata)
+
+    assert frame.shape == (1, 3)
+    assert list(frame.columns) == ["temperatures", "dataset", "info"]
+    np.testing.assert_array_equal(frame.loc[0, "temperatures"], [2000, 4000])
+
+    series = pd.Series([1.0, 2.0], name="ionization_energy")
+    assert list(_to_columnar_frame(series).columns) == ["ionization_energy"]
+
+
+def test_to_parquet(atom_data, tmp_path):
+    pytest.importorskip("pyarrow")
+    atom_data.to_parquet(tmp_path)
+
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(tmp_path / "levels_data.parquet"), atom_data.levels_prepared
+    )
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(tmp_path / "lines_data.parquet"), atom_data.lines_prepared
+    )
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(tmp_path / "ionization_data.parquet"),
+        atom_data.ionization_energies_prepared.to_frame(),
+    )
+
+    metadata = pd.read_parquet(tmp_path / "metadata.parquet")
+    pd.testing.assert_frame_equal(metadata, atom_data.meta)
+    assert metadata.loc[("format", "version"), "value"] == FORMAT_VERSION
+    assert metadata.loc[("datasets", "gfall"), "value"] == "gfall"
+
+    md5sums = metadata.loc["md5sum", "value"]
+    assert set(md5sums.index) == {
+        fname.stem for fname in tmp_path.glob("*.parquet")
+    } - {"metadata"}
+
+    for key, md5sum in md5sums.items():
+        assert md5sum == hash_pandas_object(pd.read_parquet(tmp_path / f"{key}.parquet"))
+
+
+def test_to_feather(atom_data, tmp_path):
+    pytest.importorskip("pyarrow")
+    atom_data.to_feather(tmp_path)
+
+    pd.testing.assert_frame_equal(
+        pd.read_feather(tmp_path / "levels_data.feather"),
+        atom_data.levels_prepared.reset_index(),
+    )
+    pd.testing.assert_frame_equal(
+        pd.read_feather(tmp_path / "lines_data.feather"),
+        atom_data.lines_prepared.reset_index(),
+    )
+    pd.testing.assert_frame_equal(
+        pd.read_feather(tmp_path / "macro_atom_data.feather"),
+        atom_data.macro_atom_prepared.reset_index(drop=True),
+    )
+
+    metadata = pd.read_feather(tmp_path / "metadata.feather").set_index(
+        ["field", "key"]
+    )
+    pd.testing.assert_frame_equal(metadata, atom_data.meta)
+
+    lines_metadata = pd.read_feather(tmp_path / "lines_metadata.feather")
+    assert lines_metadata.to_dict("records") == [
+        {"field": "format", "key": "version", "value": "1.0"}
+    ]
+
+    md5sums = metadata.loc["md5sum", "value"]
+    assert set(md5sums.index) == {
+        fname.stem for fname in tmp_path.glob("*.feather")
+    } - {"metadata"}
+
+    for key, md5sum in md5sums.items():
+        assert md5sum == hash_pandas_object(pd.read_feather(tmp_path / f"{key}.feather"))
+
+def test_get_package_versions_without_importlib_metadata(monkeypatch):
+    monkeypatch.setattr(base, "importlib_metadata", None)
+    base._get_package_versions.cache_clear()
+
+    try:
+        versions = base._get_package_versions()
+    finally:
+        base._get_package_versions.cache_clear()
+
+    assert versions["numpy"] == np.__version__
+    assert versions["pandas"] == pd.__version__
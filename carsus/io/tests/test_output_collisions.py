@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import interpolate
+
+from carsus.io.output.collisions import (
+    _evaluate_splines,
+    calculate_collisional_strength,
+)
+
+TEMPERATURES = np.arange(2000, 50000, 2000)
+KB_EV = 8.617333262e-5
+C_UL_TEMPERATURE_COLS = ["t{:06d}".format(t) for t in TEMPERATURES]
+
+
+def make_collisions(ttype, n_knots, n_rows=3, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "btemp": [np.linspace(0, 1, n_knots) for _ in range(n_rows)],
+            "bscups": [rng.uniform(0.1, 2, n_knots) for _ in range(n_rows)],
+            "ttype": ttype,
+            "cups": rng.uniform(0.5, 5, n_rows),
+            "delta_e": rng.uniform(1e3, 1e5, n_rows),
+            "g_u": rng.integers(1, 8, n_rows),
+        }
+    )
+
+
+def reference_collisional_strength(row):
+    """
+    Burgess & Tully 1992 upsilon for a single row, with `scipy.interpolate`
+    splines.
+
+    """
+    c = row["cups"]
+    x_knots = np.linspace(0, 1, len(row["btemp"]))
+    spline_tck = interpolate.splrep(x_knots, row["bscups"])
+    kt_delta_e = KB_EV * TEMPERATURES / row["delta_e"]
+
+    ttype = row["ttype"] - 5 if row["ttype"] > 5 else row["ttype"]
+
+    if ttype in (1, 4):
+        x = 1 - np.log(c) / np.log(kt_delta_e + c)
+    else:
+        x = kt_delta_e / (kt_delta_e + c)
+
+    y_func = interpolate.splev(x, spline_tck)
+
+    if ttype == 1:
+        upsilon = y_func * np.log(kt_delta_e + np.exp(1))
+    elif ttype == 2:
+        upsilon = y_func
+    elif ttype == 3:
+        upsilon = y_func / (kt_delta_e + 1)
+    else:
+        upsilon = y_func * np.log(kt_delta_e + c)
+
+    return 8.63e-6 * upsilon / (row["g_u"] * TEMPERATURES**0.5)
+
+
+@pytest.mark.parametrize("n_knots", [5, 9])
+@pytest.mark.parametrize("ttype", [1, 2, 3, 4, 6, 7, 8, 9])
+def test_calculate_collisional_strength(ttype, n_knots):
+    collisions = make_collisions(ttype, n_knots)
+    result = calculate_collisional_strength(
+        collisions, TEMPERATURES, KB_EV, C_UL_TEMPERATURE_COLS
+    )
+
+    assert list(result.columns) == C_UL_TEMPERATURE_COLS
+    assert result.index.equals(collisions.index)
+
+    for i, row in collisions.iterrows():
+        np.testing.assert_allclose(
+            result.loc[i].to_numpy(), reference_collisional_strength(row), rtol=1e-10
+        )
+
+
+def test_calculate_collisional_strength_ttype_5_raises():
+    collisions = make_collisions(5, 5)
+
+    with pytest.raises(ValueError):
+        calculate_collisional_strength(
+            collisions, TEMPERATURES, KB_EV, C_UL_TEMPERATURE_COLS
+        )
+
+
+def test_evaluate_splines_mixed_knots():
+    rng = np.random.default_rng(1)
+    y_knots = pd.Series(
+        [rng.uniform(0.1, 2, n) for n in [5, 9, 5, 9]], dtype=object
+    )
+
+    # Includes points outside [0, 1], which are extrapolated
+    x = np.tile(np.linspace(-0.1, 1.1, 13), (len(y_knots), 1))
+    y_func = _evaluate_splines(y_knots, x)
+
+    for i, y in enumerate(y_knots):
+        spline_tck = interpolate.splrep(np.linspace(0, 1, len(y)), y)
+        np.testing.assert_allclose(
+            y_func[i], interpolate.splev(x[i], spline_tck), rtol=1e-10, atol=1e-12
+        )
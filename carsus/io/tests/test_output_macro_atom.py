@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import astropy.constants as const
+
+from carsus.io.output.macro_atom import MacroAtomPreparer
+
+
+@pytest.fixture
+def levels():
+    # Three levels of H I and the artificial fully ionized level of H
+    return pd.DataFrame(
+        {
+            "level_id": [1, 2, 3, -1],
+            "atomic_number": [1, 1, 1, 1],
+            "ion_number": [0, 0, 0, 1],
+            "level_number": [0, 1, 2, 0],
+            "energy": [0.0, 1.6e-11, 1.9e-11, 0.0],
+            "g": [2, 8, 18, 1],
+            "metastable": [True, False, False, True],
+        }
+    )
+
+
+@pytest.fixture
+def lines():
+    return pd.DataFrame(
+        {
+            "line_id": [10, 11, 12],
+            "lower_level_id": [1, 1, 2],
+            "upper_level_id": [2, 3, 3],
+            "atomic_number": [1, 1, 1],
+            "ion_number": [0, 0, 0],
+            "level_number_lower": [0, 0, 1],
+            "level_number_upper": [1, 2, 2],
+            "nu": [2.5e15, 2.9e15, 4.6e14],
+            "f_ul": [0.1, 0.02, 0.2],
+            "f_lu": [0.4, 0.08, 0.6],
+        }
+    )
+
+
+@pytest.fixture
+def macro_atom_preparer(levels, lines):
+    macro_atom_preparer = MacroAtomPreparer(levels, lines)
+    macro_atom_preparer.create_macro_atom()
+    macro_atom_preparer.create_macro_atom_references()
+    return macro_atom_preparer
+
+
+def expected_probabilities(nu, f_ul, f_lu, e_lower, e_upper):
+    c, h = const.c.cgs.value, const.h.cgs.value
+    return (
+        2 * nu**2 * f_ul / c**2 * (e_upper - e_lower),
+        2 * nu**2 * f_ul / c**2 * e_lower,
+        f_lu * e_lower / (h * nu),
+    )
+
+
+def test_create_macro_atom(macro_atom_preparer):
+    macro_atom = macro_atom_preparer.macro_atom_prepared
+
+    # Rows are grouped by source level, keeping the line order within each
+    # level and the emission down, internal down, internal up order
+    expected = pd.DataFrame(
+        {
+            "source_level_number": [0, 0, 1, 1, 1, 2, 2, 2, 2],
+            "destination_level_number": [1, 2, 0, 0, 2, 0, 0, 1, 1],
+            "transition_type": [1, 1, -1, 0, 1, -1, 0, -1, 0],
+            "transition_line_id": [10, 11, 10, 10, 12, 11, 11, 12, 12],
+        }
+    )
+    pd.testing.assert_frame_equal(
+        macro_atom.loc[:, expected.columns], expected, check_dtype=False
+    )
+    assert (macro_atom["atomic_number"] == 1).all()
+    assert (macro_atom["ion_number"] == 0).all()
+
+    p_10 = expected_probabilities(2.5e15, 0.1, 0.4, 0.0, 1.6e-11)
+    p_11 = expected_probabilities(2.9e15, 0.02, 0.08, 0.0, 1.9e-11)
+    p_12 = expected_probabilities(4.6e14, 0.2, 0.6, 1.6e-11, 1.9e-11)
+
+    np.testing.assert_allclose(
+        macro_atom["transition_probability"],
+        [
+            p_10[2],
+            p_11[2],
+            p_10[0],
+            p_10[1],
+            p_12[2],
+            p_11[0],
+            p_11[1],
+            p_12[0],
+            p_12[1],
+        ],
+        rtol=1e-14,
+    )
+
+
+def test_create_macro_atom_references(macro_atom_preparer):
+    references = macro_atom_preparer.macro_atom_references_prepared
+
+    # The artificial level has no transitions
+    expected = pd.DataFrame(
+        {
+            "atomic_number": [1, 1, 1, 1],
+            "ion_number": [0, 0, 0, 1],
+            "source_level_number": [0, 1, 2, 0],
+            "count_down": [0, 1, 2, 0],
+            "count_up": [2, 1, 0, 0],
+            "count_total": [2, 3, 4, 0],
+        }
+    ).set_index(["atomic_number", "ion_number", "source_level_number"])
+    pd.testing.assert_frame_equal(references, expected)
+
+    # The block of each level in the macro atom data starts at the
+    # cumulative sum of the previous `count_total`
+    macro_atom = macro_atom_preparer.macro_atom_prepared
+    references_start_index = np.cumsum(references["count_total"]) - references[
+        "count_total"
+    ]
+    np.testing.assert_array_equal(references_start_index, [0, 2, 5, 9])
+
+    for (_, _, source_level_number), start, count in zip(
+        references.index, references_start_index, references["count_total"]
+    ):
+        block = macro_atom.iloc[start : start + count]
+        assert (block["source_level_number"] == source_level_number).all()
@@ -1,7 +1,8 @@
 import pytest
+import pandas as pd
 
 from numpy.testing import assert_allclose
-from carsus.io.util import to_flat_dict, to_nom_val_and_std_dev
+from carsus.io.util import to_flat_dict, to_nom_val_and_std_dev, get_lvl_index2id
 
 @pytest.mark.parametrize("test_input,expected",[
     ('isotopic_comp = 2.1234132(12)',
@@ -21,4 +22,73 @@ def test_to_flat_dict(test_input, expected, entry):
 ])
 def test_to_nom_val_and_std_dev(test_input, expected):
     mu, sigma = to_nom_val_and_std_dev(test_input)
-    assert_allclose((mu, sigma), expected)
\ No newline at end of file
+    assert_allclose((mu, sigma), expected)
+
+def test_get_lvl_index2id():
+    levels_all = pd.DataFrame(
+        {
+            "level_id": [1, 2, 3, 4, 5],
+            "atomic_number": [1, 1, 1, 2, 2],
+            "ion_number": [0, 0, 0, 1, 1],
+        }
+    )
+    lines = pd.DataFrame(
+        {
+            "atomic_number": [1, 1],
+            "ion_number": [0, 0],
+            "level_index_lower": [0, 1],
+            "level_index_upper": [2, 2],
+        }
+    ).set_index(["atomic_number", "ion_number"])
+
+    lines = get_lvl_index2id(lines, levels_all)
+    assert lines["lower_level_id"].tolist() == [1, 2]
+    assert lines["upper_level_id"].tolist() == [3, 3]
+
+
+def test_get_lvl_index2id_ion_columns():
+    levels_all = pd.DataFrame(
+        {
+            "level_id": [1, 2, 3, 4, 5],
+            "atomic_number": [1, 1, 1, 2, 2],
+            "ion_number": [0, 0, 0, 1, 1],
+        }
+    )
+    collisions = pd.DataFrame(
+        {
+            "atomic_number": [2, 1, 1],
+            "ion_number": [1, 0, 0],
+            "level_index_lower": [0, 0, 1],
+            "level_index_upper": [1, 2, 2],
+        }
+    )
+
+    result = get_lvl_index2id(collisions, levels_all)
+    assert result["lower_level_id"].tolist() == [4, 1, 2]
+    assert result["upper_level_id"].tolist() == [5, 3, 3]
+    assert result.index.equals(collisions.index)
+
+    # The input is left untouched
+    assert "lower_level_id" not in collisions.columns
+
+
+@pytest.mark.parametrize("level_index_lower,level_index_upper", [(0, 2), (2, 0)])
+def test_get_lvl_index2id_unknown_level_raises(level_index_lower, level_index_upper):
+    levels_all = pd.DataFrame(
+        {
+            "level_id": [1, 2, 3, 4, 5],
+            "atomic_number": [1, 1, 1, 2, 2],
+            "ion_number": [0, 0, 0, 1, 1],
+        }
+    )
+    lines = pd.DataFrame(
+        {
+            "atomic_number": [2],
+            "ion_number": [1],
+            "level_index_lower": [level_index_lower],
+            "level_index_upper": [level_index_upper],
+        }
+    )
+
+    with pytest.raises(KeyError):
+        get_lvl_index2id(lines, levels_all)
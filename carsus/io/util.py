@@ -151,28 +151,45 @@ def get_lvl_index2id(df, levels_all):
     """
     Matches level indexes with level IDs for a given DataFrame.
 
-    """
-    # TODO: re-write this method without a for loop
-    ion = df.index.unique()
-    lvl_index2id = levels_all.set_index(["atomic_number", "ion_number"]).loc[ion]
-    lvl_index2id = lvl_index2id.reset_index()
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        With the columns `level_index_lower` and `level_index_upper`, and
+        `atomic_number` and `ion_number` either as columns or as index.
+        It may contain several ions.
+    levels_all : pandas.DataFrame
+        Levels with `level_id`, `atomic_number` and `ion_number` columns.
+        `level_index` is the position of a level within its ion.
 
-    lower_level_id = []
-    upper_level_id = []
+    Returns
+    -------
+    pandas.DataFrame
+        `df` with `lower_level_id` and `upper_level_id` columns added, and
+        the ion index (if any) reset.
 
-    df = df.reset_index()
-    for row in df.itertuples():
-        llid = row.level_index_lower
-        ulid = row.level_index_upper
+    """
+    ion_columns = ["atomic_number", "ion_number"]
+    level_index = levels_all.groupby(ion_columns, sort=False).cumcount()
+    lvl_index2id = pd.MultiIndex.from_arrays(
+        [levels_all["atomic_number"], levels_all["ion_number"], level_index]
+    )
+    level_ids = levels_all["level_id"].to_numpy()
 
-        upper = lvl_index2id.at[ulid, "level_id"]
-        lower = lvl_index2id.at[llid, "level_id"]
+    if "atomic_number" in df.columns:
+        df = df.copy(deep=False)
+    else:
+        df = df.reset_index()
+
+    for end in ["lower", "upper"]:
+        level_keys = pd.MultiIndex.from_arrays(
+            [df["atomic_number"], df["ion_number"], df[f"level_index_{end}"]]
+        )
+        position = lvl_index2id.get_indexer(level_keys)
 
-        lower_level_id.append(lower)
-        upper_level_id.append(upper)
+        if (position == -1).any():
+            raise KeyError(f"Unknown `level_index_{end}` values for `levels_all`.")
 
-    df["lower_level_id"] = pd.Series(lower_level_id)
-    df["upper_level_id"] = pd.Series(upper_level_id)
+        df[f"{end}_level_id"] = level_ids[position]
 
     return df
 
@@ -181,32 +198,23 @@ def create_artificial_fully_ionized(levels):
     Returns a DataFrame with fully ionized levels.
 
     """
-    fully_ionized_levels = []
-
-    for atomic_number, _ in levels.groupby("atomic_number"):
-        fully_ionized_levels.append(
-            (-1, atomic_number, atomic_number, 0, 0.0, 1, True)
-        )
-
-    levels_columns = [
-        "level_id",
-        "atomic_number",
-        "ion_number",
-        "level_number",
-        "energy",
-        "g",
-        "metastable",
-    ]
-
-    fully_ionized_levels_dtypes = [
-        (key, levels.dtypes[key]) for key in levels_columns
-    ]
-
-    fully_ionized_levels = np.array(
-        fully_ionized_levels, dtype=fully_ionized_levels_dtypes
+    atomic_numbers = np.unique(levels["atomic_number"].to_numpy())
+
+    fully_ionized_levels = pd.DataFrame(
+        {
+            "level_id": -1,
+            "atomic_number": atomic_numbers,
+            "ion_number": atomic_numbers,
+            "level_number": 0,
+            "energy": 0.0,
+            "g": 1,
+            "metastable": True,
+        }
     )
 
-    return pd.DataFrame(data=fully_ionized_levels)
+    return fully_ionized_levels.astype(
+        {key: levels.dtypes[key] for key in fully_ionized_levels.columns}
+    )
 
 def exclude_artificial_levels(levels_df):
     """Removes artificially created levels from a dataframe of levels
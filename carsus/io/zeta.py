@@ -35,12 +35,12 @@ class KnoxLongZeta(BaseParser):
             usecols=range(1, 23),
             names=names,
             comment="#",
-            sep=r"\s+")
-
-        self.base = (
-            pd.DataFrame(zeta_df).set_index(
-                ["atomic_number", "ion_charge"])
+            sep=r"\s+",
+            dtype={name: np.float64 for name in names[2:]},
         )
 
+        # `read_csv` already returns a DataFrame, index it without a copy
+        self.base = zeta_df.set_index(["atomic_number", "ion_charge"])
+
         columns = [float(c) for c in self.base.columns]
         self.base.columns = pd.Index(columns, name="temp", dtype=np.float64)
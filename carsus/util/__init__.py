@@ -13,4 +13,8 @@ from carsus.util.helpers import (
         )
 from carsus.util.selected import parse_selected_atoms, parse_selected_species
 
-from carsus.util.hash import serialize_pandas_object, hash_pandas_object
+from carsus.util.hash import (
+        serialize_pandas_object,
+        hash_pandas_object,
+        update_hash_pandas_object
+        )
@@ -16,6 +16,33 @@ def serialize_pandas_object(pd_object):
     return pickle.dumps(pd_object)
 
 
+class _HashWriter:
+    """File-like object that feeds the written bytes to hash objects."""
+
+    def __init__(self, hash_objs):
+        self.hash_objs = hash_objs
+
+    def write(self, data):
+        for hash_obj in self.hash_objs:
+            hash_obj.update(data)
+
+
+def update_hash_pandas_object(pd_object, *hash_objs):
+    """Update hash objects with the Pickle serialization of a Pandas object.
+
+    The serialized bytes are streamed to the hash objects as they are
+    produced, so the whole serialization is never held in memory.
+
+    Parameters
+    ----------
+    pd_object : pandas.Series or pandas.DataFrame
+        Pandas object to be serialized with Pickle.
+    *hash_objs : hashlib hash objects
+        Objects to be updated, e.g. `hashlib.md5()`.
+    """
+    pickle.dump(pd_object, _HashWriter(hash_objs))
+
+
 def hash_pandas_object(pd_object, algorithm="md5"):
     """Hash Pandas objects.
 
@@ -44,4 +71,7 @@ def hash_pandas_object(pd_object, algorithm="md5"):
     else:
         raise ValueError('algorithm not supported')
 
-    return hash_func(serialize_pandas_object(pd_object)).hexdigest()
\ No newline at end of file
+    hash_obj = hash_func()
+    update_hash_pandas_object(pd_object, hash_obj)
+
+    return hash_obj.hexdigest()
\ No newline at end of file
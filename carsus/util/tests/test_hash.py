@@ -1,6 +1,12 @@
+import hashlib
+
 import pytest
 import pandas as pd
-from carsus.util import hash_pandas_object
+from carsus.util import (
+    hash_pandas_object,
+    serialize_pandas_object,
+    update_hash_pandas_object,
+)
 
 
 @pytest.mark.parametrize(
@@ -12,3 +18,12 @@ from carsus.util import hash_pandas_object
 )
 def test_hash_pd(values, md5):
     assert hash_pandas_object(pd.DataFrame(values))[:10] == md5
+
+
+def test_update_hash_pd():
+    df = pd.DataFrame([(0, 1), (1, 2), (2, 3), (3, 4)])
+    md5, total = hashlib.md5(), hashlib.md5()
+    update_hash_pandas_object(df, md5, total)
+
+    expected = hashlib.md5(serialize_pandas_object(df)).hexdigest()
+    assert md5.hexdigest() == total.hexdigest() == expected